@@ -3,12 +3,284 @@ Classical Optimizer - Handles post-processing and heuristic optimization
 Separated from quantum layer as per interaction diagram
 """
 import numpy as np
+import math
+import os
 import time
 import logging
-from typing import List, Tuple, Dict, Any
+import itertools
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
+from typing import List, Tuple, Dict, Any, Optional
+from numba import njit, prange
+
+from utils import NUMBA_PARALLEL_LOCK, start_process_pool, worker_share
 
 logger = logging.getLogger(__name__)
 
+# Tile edge for the 2-opt (i, j) sweep; keeps the touched distance rows in L1
+_TWO_OPT_BLOCK = 64
+
+# Candidate list size for neighbour-pruned 2-opt on larger routes
+_TWO_OPT_NEIGHBORS = 20
+
+# Candidates starting this many times above the cheapest one are not worth refining
+_CANDIDATE_COST_MARGIN = 1.5
+
+# Nearest-neighbour starts refined concurrently for the classical warm start
+_MULTISTART_RESTARTS = 8
+
+# Routes up to this many stops are solved exactly (Held-Karp is O(n^2 2^n))
+HELD_KARP_MAX_STOPS = 12
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _two_opt_njit(route: np.ndarray, distance_matrix: np.ndarray, max_iterations: int) -> np.ndarray:
+    """Native 2-opt kernel; reverses segments of ``route`` in place"""
+    n_nodes = route.shape[0]
+    improved = True
+    iteration = 0
+    
+    while improved and iteration < max_iterations:
+        improved = False
+        iteration += 1
+        
+        # Walk the (i, j) triangle in blocks so each block reuses cached rows
+        for ii in range(1, n_nodes - 1, _TWO_OPT_BLOCK):
+            i_end = min(ii + _TWO_OPT_BLOCK, n_nodes - 1)
+            for jj in range(ii + 1, n_nodes, _TWO_OPT_BLOCK):
+                j_end = min(jj + _TWO_OPT_BLOCK, n_nodes)
+                for i in range(ii, i_end):
+                    for j in range(max(i + 1, jj), j_end):
+                        current_dist = distance_matrix[route[i - 1], route[i]]
+                        new_dist = distance_matrix[route[i - 1], route[j]]
+                        # Open path: reversing the tail changes only one edge
+                        if j + 1 < n_nodes:
+                            nxt = route[j + 1]
+                            current_dist += distance_matrix[route[j], nxt]
+                            new_dist += distance_matrix[route[i], nxt]
+                        
+                        if new_dist < current_dist:
+                            # In-place two-pointer reversal of route[i:j+1]
+                            lo, hi = i, j
+                            while lo < hi:
+                                tmp = route[lo]
+                                route[lo] = route[hi]
+                                route[hi] = tmp
+                                lo += 1
+                                hi -= 1
+                            improved = True
+    
+    return route
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _two_opt_neighbors_njit(route: np.ndarray, distance_matrix: np.ndarray, neighbors: np.ndarray,
+                            max_iterations: int) -> np.ndarray:
+    """First-improvement 2-opt restricted to each node's nearest neighbours"""
+    n_nodes = route.shape[0]
+    position = np.empty(distance_matrix.shape[0], dtype=np.int64)
+    for k in range(n_nodes):
+        position[route[k]] = k
+    
+    improved = True
+    iteration = 0
+    
+    while improved and iteration < max_iterations:
+        improved = False
+        iteration += 1
+        
+        for i in range(1, n_nodes - 1):
+            prev_node = route[i - 1]
+            current_edge = distance_matrix[prev_node, route[i]]
+            
+            # Try both ends of edge (route[i-1], route[i]) as the endpoint of a
+            # new shorter edge; neighbours are sorted, so stop at the first one
+            # that is no shorter than the edge being removed
+            for side in range(2):
+                anchor = prev_node if side == 0 else route[i]
+                found = False
+                for k in range(neighbors.shape[1]):
+                    candidate = neighbors[anchor, k]
+                    if distance_matrix[anchor, candidate] >= current_edge:
+                        break
+                    if side == 0:
+                        j = position[candidate]
+                    else:
+                        j = position[candidate] - 1
+                    if j <= i:
+                        continue
+                    
+                    current_dist = current_edge
+                    new_dist = distance_matrix[prev_node, route[j]]
+                    # Open path: reversing the tail changes only one edge
+                    if j + 1 < n_nodes:
+                        nxt = route[j + 1]
+                        current_dist += distance_matrix[route[j], nxt]
+                        new_dist += distance_matrix[route[i], nxt]
+                    
+                    if new_dist < current_dist:
+                        lo, hi = i, j
+                        while lo < hi:
+                            tmp = route[lo]
+                            route[lo] = route[hi]
+                            route[hi] = tmp
+                            position[route[lo]] = lo
+                            position[route[hi]] = hi
+                            lo += 1
+                            hi -= 1
+                        improved = True
+                        found = True
+                        break
+                if found:
+                    break
+    
+    return route
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _simulated_annealing_njit(route: np.ndarray, distance_matrix: np.ndarray, uniforms: np.ndarray,
+                              i_draws: np.ndarray, j_draws: np.ndarray, initial_temp: float,
+                              final_temp: float, cooling_rate: float) -> np.ndarray:
+    """Native simulated annealing kernel consuming pre-drawn random numbers"""
+    n_nodes = route.shape[0]
+    current_cost = 0.0
+    for k in range(n_nodes - 1):
+        current_cost += distance_matrix[route[k], route[k + 1]]
+    
+    best_route = route.copy()
+    best_cost = current_cost
+    temperature = initial_temp
+    
+    for iteration in range(uniforms.shape[0]):
+        # Random 2-opt segment, scored from the edges it changes (open path)
+        i = i_draws[iteration]
+        j = i + 1 + int(j_draws[iteration] * (n_nodes - 1 - i))
+        prev_row = distance_matrix[route[i - 1]]
+        delta = prev_row[route[j]] - prev_row[route[i]]
+        if j + 1 < n_nodes:
+            nxt = route[j + 1]
+            delta += distance_matrix[route[i], nxt] - distance_matrix[route[j], nxt]
+        
+        if delta < 0 or uniforms[iteration] < math.exp(-delta / temperature):
+            lo, hi = i, j
+            while lo < hi:
+                tmp = route[lo]
+                route[lo] = route[hi]
+                route[hi] = tmp
+                lo += 1
+                hi -= 1
+            current_cost += delta
+            
+            if current_cost < best_cost:
+                best_route[:] = route
+                best_cost = current_cost
+        
+        # Cool down
+        temperature *= cooling_rate
+        
+        if temperature < final_temp:
+            break
+    
+    return best_route
+
+
+@njit(cache=True, nogil=True)
+def _nearest_neighbor_njit(distance_matrix: np.ndarray, start: int) -> np.ndarray:
+    """Greedy nearest-neighbour tour from ``start``"""
+    n_nodes = distance_matrix.shape[0]
+    route = np.empty(n_nodes, dtype=np.int64)
+    visited = np.zeros(n_nodes, dtype=np.bool_)
+    route[0] = start
+    visited[start] = True
+    
+    current = start
+    for pos in range(1, n_nodes):
+        nearest = -1
+        for k in range(n_nodes):
+            if not visited[k] and (nearest < 0 or distance_matrix[current, k] < distance_matrix[current, nearest]):
+                nearest = k
+        route[pos] = nearest
+        visited[nearest] = True
+        current = nearest
+    
+    return route
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _multistart_two_opt_njit(distance_matrix: np.ndarray, starts: np.ndarray, root: int,
+                             neighbors: np.ndarray, max_iterations: int):
+    """
+    Nearest-neighbour tour from every start in parallel, re-rooted at ``root``
+    and refined by 2-opt (which keeps route[0] fixed); returns (routes, costs)
+    """
+    n_nodes = distance_matrix.shape[0]
+    routes = np.empty((starts.shape[0], n_nodes), dtype=np.int64)
+    costs = np.empty(starts.shape[0])
+    
+    for s in prange(starts.shape[0]):
+        route = _nearest_neighbor_njit(distance_matrix, starts[s])
+        if starts[s] != root:
+            shift = 0
+            for k in range(n_nodes):
+                if route[k] == root:
+                    shift = k
+            route = np.concatenate((route[shift:], route[:shift]))
+        # An empty neighbour table selects the full sweep
+        if neighbors.shape[1] == 0:
+            _two_opt_njit(route, distance_matrix, max_iterations)
+        else:
+            _two_opt_neighbors_njit(route, distance_matrix, neighbors, max_iterations)
+        
+        cost = 0.0
+        for k in range(n_nodes - 1):
+            cost += distance_matrix[route[k], route[k + 1]]
+        routes[s] = route
+        costs[s] = cost
+    
+    return routes, costs
+
+@njit(cache=True, nogil=True)
+def _held_karp_njit(distance_matrix: np.ndarray, start: int) -> np.ndarray:
+    """Exact shortest open path from ``start`` through every stop (bitmask DP)"""
+    n = distance_matrix.shape[0]
+    full = (1 << n) - 1
+    cost = np.full((full + 1, n), np.inf)
+    parent = np.full((full + 1, n), -1, dtype=np.int64)
+    cost[1 << start, start] = 0.0
+    
+    for mask in range(full + 1):
+        if not (mask >> start) & 1:
+            continue
+        for last in range(n):
+            base = cost[mask, last]
+            if base == np.inf:
+                continue
+            for nxt in range(n):
+                if (mask >> nxt) & 1:
+                    continue
+                next_mask = mask | (1 << nxt)
+                candidate = base + distance_matrix[last, nxt]
+                if candidate < cost[next_mask, nxt]:
+                    cost[next_mask, nxt] = candidate
+                    parent[next_mask, nxt] = last
+    
+    # Walk the parent table back from the cheapest end stop
+    route = np.empty(n, dtype=np.int64)
+    last = np.argmin(cost[full])
+    mask = full
+    for pos in range(n - 1, -1, -1):
+        route[pos] = last
+        prev = parent[mask, last]
+        mask ^= 1 << last
+        last = prev
+    return route
+
+
+def _as_kernel_matrix(distance_matrix: np.ndarray) -> np.ndarray:
+    """C-contiguous float32 distance matrix for the kernels (no copy if already one)"""
+    return np.ascontiguousarray(distance_matrix, dtype=np.float32)
+
+
 class ClassicalOptimizer:
     """
     Classical optimization layer for post-processing quantum results
@@ -16,30 +288,74 @@ class ClassicalOptimizer:
     """
     
     def __init__(self):
-        pass
+        self._executor = None
+        self._search_pool = None
+        # Pools are started lazily from request threads
+        self._pool_lock = threading.Lock()
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Lazily start the worker pool used for multi-start optimization"""
+        with self._pool_lock:
+            if self._executor is None:
+                self._executor = start_process_pool(worker_share(os.cpu_count() or 1))
+            return self._executor
+    
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Drop a broken worker pool so the next call starts a fresh one"""
+        with self._pool_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
     
-    def heuristic_optimization(self, candidate_routes: List[List[int]], distance_matrix: np.ndarray) -> Dict[str, Any]:
-        """Apply heuristic optimization to candidate routes"""
+    def _get_search_pool(self) -> ThreadPoolExecutor:
+        """Lazily start the threads that run a candidate's native searches side by side"""
+        with self._pool_lock:
+            if self._search_pool is None:
+                self._search_pool = ThreadPoolExecutor(max_workers=2)
+            return self._search_pool
+    
+    def _map_candidates(self, candidate_routes: List[List[int]], distance_matrix: np.ndarray,
+                        neighbors: Optional[np.ndarray]) -> List[Tuple[List[int], float]]:
+        """Optimize candidates in the process pool, retrying once on a fresh pool if it broke"""
+        seeds = np.random.SeedSequence().spawn(len(candidate_routes))
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return list(executor.map(
+                    _optimize_candidate, candidate_routes,
+                    itertools.repeat(distance_matrix), itertools.repeat(neighbors), seeds
+                ))
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                if attempt:
+                    raise
+                logger.warning("Optimizer worker pool broke; restarting it")
+    
+    def heuristic_optimization(self, candidate_routes: List[List[int]], distance_matrix: np.ndarray,
+                               neighbors: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Apply heuristic optimization to candidate routes
+        
+        ``neighbors`` may pass in ``nearest_neighbor_lists`` already computed for this matrix
+        """
         start_time = time.time()
+        # Distances don't need double precision; float32 halves memory traffic
+        distance_matrix = _as_kernel_matrix(distance_matrix)
+        
+        if neighbors is None:
+            neighbors = self.nearest_neighbor_lists(distance_matrix)
+        candidate_routes = self.prepare_candidates(candidate_routes, distance_matrix)
         
         best_route = None
         best_cost = float('inf')
         
-        # Process each candidate route
-        for route in candidate_routes:
-            # Apply multiple optimization techniques
-            optimized_routes = [
-                self.two_opt_optimization(route.copy(), distance_matrix),
-                self.nearest_neighbor_improvement(route.copy(), distance_matrix),
-                self.simulated_annealing(route.copy(), distance_matrix, max_iterations=100)
-            ]
-            
-            # Find best result
-            for opt_route in optimized_routes:
-                cost = self.calculate_route_cost(opt_route, distance_matrix)
-                if cost < best_cost:
-                    best_cost = cost
-                    best_route = opt_route
+        # Candidates are independent starts, so fan them out across processes
+        if len(candidate_routes) > 1:
+            results = self._map_candidates(candidate_routes, distance_matrix, neighbors)
+            best_route, best_cost = min(results, key=itemgetter(1))
+        elif candidate_routes:
+            best_route, best_cost = self.optimize_candidate(
+                candidate_routes[0], distance_matrix, neighbors, concurrent=True
+            )
         
         # If no candidates provided, use pure classical approach
         if not candidate_routes:
@@ -55,127 +371,190 @@ class ClassicalOptimizer:
             'method': 'Classical Heuristic Optimization'
         }
     
-    def two_opt_optimization(self, route: List[int], distance_matrix: np.ndarray) -> List[int]:
-        """2-opt local search improvement"""
-        n_nodes = len(route)
-        improved = True
-        max_iterations = 50
-        iteration = 0
+    def held_karp(self, distance_matrix: np.ndarray, start_index: int = 0) -> Dict[str, Any]:
+        """Exact route for small instances, starting at ``start_index``"""
+        start_time = time.time()
+        route = _held_karp_njit(_as_kernel_matrix(distance_matrix), start_index).tolist()
         
-        while improved and iteration < max_iterations:
-            improved = False
-            iteration += 1
-            
-            for i in range(1, n_nodes - 1):
-                for j in range(i + 1, n_nodes):
-                    # Calculate current distance
-                    current_dist = (
-                        distance_matrix[route[i-1]][route[i]] +
-                        distance_matrix[route[j]][route[(j+1) % n_nodes]]
-                    )
-                    
-                    # Calculate distance after 2-opt swap
-                    new_dist = (
-                        distance_matrix[route[i-1]][route[j]] +
-                        distance_matrix[route[i]][route[(j+1) % n_nodes]]
-                    )
-                    
-                    # If improvement found, apply 2-opt swap
-                    if new_dist < current_dist:
-                        route[i:j+1] = route[i:j+1][::-1]
-                        improved = True
+        return {
+            'route': route,
+            'cost': self.calculate_route_cost(route, distance_matrix),
+            'computation_time': time.time() - start_time,
+            'method': 'Held-Karp Exact'
+        }
+    
+    def prepare_candidates(self, candidate_routes: List[List[int]], distance_matrix: np.ndarray) -> List[List[int]]:
+        """Dedupe candidate routes, order them by cost and drop hopeless ones"""
+        # Quantum sampling often returns the same route many times
+        seen = set()
+        unique_routes = []
+        for route in candidate_routes:
+            key = tuple(route)
+            if key not in seen:
+                seen.add(key)
+                unique_routes.append(route)
+        
+        if len(unique_routes) < 2:
+            return unique_routes
         
-        return route
+        costs = self.calculate_route_costs(unique_routes, distance_matrix)
+        order = np.argsort(costs, kind='stable')
+        cutoff = costs[order[0]] * _CANDIDATE_COST_MARGIN
+        return [unique_routes[k] for k in order if costs[k] <= cutoff]
+    
+    def optimize_candidate(self, route: List[int], distance_matrix: np.ndarray,
+                           neighbors: Optional[np.ndarray] = None,
+                           rng: Optional[np.random.Generator] = None,
+                           concurrent: bool = False) -> Tuple[List[int], float]:
+        """Run every local search on one candidate route and keep the best
+        
+        With ``concurrent`` the 2-opt and annealing kernels (which release the
+        GIL) run on the search threads while nearest-neighbour improvement runs
+        here; process-pool workers leave it off so cores aren't oversubscribed.
+        """
+        # Apply multiple optimization techniques; the native kernels work on
+        # their own array copy, so the candidate is never duplicated here
+        if concurrent:
+            pool = self._get_search_pool()
+            two_opt = pool.submit(self.two_opt_optimization, route, distance_matrix, neighbors)
+            annealed = pool.submit(self.simulated_annealing, route, distance_matrix, 100, rng)
+            improved = self.nearest_neighbor_improvement(route, distance_matrix)
+            optimized_routes = [two_opt.result(), improved, annealed.result()]
+        else:
+            optimized_routes = [
+                self.two_opt_optimization(route, distance_matrix, neighbors),
+                self.nearest_neighbor_improvement(route, distance_matrix),
+                self.simulated_annealing(route, distance_matrix, max_iterations=100, rng=rng)
+            ]
+        
+        # Score all results in one gather and keep the best
+        costs = self.calculate_route_costs(optimized_routes, distance_matrix)
+        best_idx = int(costs.argmin())
+        return optimized_routes[best_idx], float(costs[best_idx])
+    
+    def nearest_neighbor_lists(self, distance_matrix: np.ndarray, k: int = _TWO_OPT_NEIGHBORS) -> Optional[np.ndarray]:
+        """Indices of each node's k nearest neighbours, nearest first, or None when k covers every node"""
+        n_nodes = len(distance_matrix)
+        if n_nodes - 1 <= k:
+            return None
+        # Only the k + 1 closest entries per row (the node itself among them) need ordering
+        rows = np.arange(n_nodes)[:, None]
+        nearest = np.argpartition(distance_matrix, k, axis=1)[:, :k + 1]
+        nearest = nearest[rows, np.argsort(distance_matrix[rows, nearest], axis=1, kind='stable')]
+        # Drop the node itself; with duplicate stops it may have been crowded out, so drop the farthest instead
+        keep = nearest != rows
+        keep[keep.all(axis=1), -1] = False
+        return np.ascontiguousarray(nearest[keep].reshape(n_nodes, k))
+    
+    def two_opt_optimization(self, route: List[int], distance_matrix: np.ndarray,
+                             neighbors: Optional[np.ndarray] = None) -> List[int]:
+        """2-opt local search improvement
+        
+        Uses first-improvement over ``neighbors`` (see nearest_neighbor_lists)
+        when the route is larger than the candidate lists, and the full
+        tiled sweep otherwise.
+        """
+        route_arr = np.array(route, dtype=np.int64)
+        distance_matrix = _as_kernel_matrix(distance_matrix)
+        if neighbors is None:
+            neighbors = self.nearest_neighbor_lists(distance_matrix)
+        if neighbors is None:
+            return _two_opt_njit(route_arr, distance_matrix, 50).tolist()
+        return _two_opt_neighbors_njit(route_arr, distance_matrix, neighbors, 50).tolist()
     
     def nearest_neighbor_improvement(self, route: List[int], distance_matrix: np.ndarray) -> List[int]:
         """Improve route using nearest neighbor principles"""
-        n_nodes = len(route)
+        distance_matrix = _as_kernel_matrix(distance_matrix)
         improved_route = [route[0]]  # Keep starting point
-        remaining = set(route[1:])
+        
+        # Only nodes on the route are candidates; everything else starts visited
+        visited = np.ones(len(distance_matrix), dtype=bool)
+        visited[np.asarray(route[1:], dtype=np.intp)] = False
         
         current = route[0]
-        while remaining:
+        for _ in range(len(route) - 1):
             # Find nearest unvisited node
-            nearest = min(remaining, key=lambda x: distance_matrix[current][x])
+            nearest = int(np.where(visited, np.inf, distance_matrix[current]).argmin())
             improved_route.append(nearest)
-            remaining.remove(nearest)
+            visited[nearest] = True
             current = nearest
         
         return improved_route
     
-    def simulated_annealing(self, route: List[int], distance_matrix: np.ndarray, max_iterations: int = 100) -> List[int]:
+    def simulated_annealing(self, route: List[int], distance_matrix: np.ndarray, max_iterations: int = 100,
+                            rng: Optional[np.random.Generator] = None) -> List[int]:
         """Simulated annealing optimization"""
-        current_route = route.copy()
-        current_cost = self.calculate_route_cost(current_route, distance_matrix)
+        current_route = np.array(route, dtype=np.int64)
+        n_nodes = len(current_route)
+        if n_nodes < 4:
+            return current_route.tolist()
         
-        best_route = current_route.copy()
-        best_cost = current_cost
+        # Draw every random number up front so the loop runs natively
+        if rng is None:
+            rng = np.random.default_rng()
+        uniforms = rng.random(max_iterations)
+        i_draws = rng.integers(1, n_nodes - 1, size=max_iterations)
+        j_draws = rng.random(max_iterations)
         
         # Simulated annealing parameters
         initial_temp = 100.0
         final_temp = 1.0
         cooling_rate = 0.95
         
-        temperature = initial_temp
-        
-        for iteration in range(max_iterations):
-            # Generate neighbor solution using 2-opt swap
-            new_route = self.two_opt_swap(current_route.copy())
-            new_cost = self.calculate_route_cost(new_route, distance_matrix)
-            
-            # Accept or reject the new solution
-            if new_cost < current_cost or np.random.random() < np.exp(-(new_cost - current_cost) / temperature):
-                current_route = new_route
-                current_cost = new_cost
-                
-                if new_cost < best_cost:
-                    best_route = new_route.copy()
-                    best_cost = new_cost
-            
-            # Cool down
-            temperature *= cooling_rate
-            
-            if temperature < final_temp:
-                break
-        
-        return best_route
+        best_route = _simulated_annealing_njit(
+            current_route, _as_kernel_matrix(distance_matrix), uniforms,
+            i_draws, j_draws, initial_temp, final_temp, cooling_rate
+        )
+        return best_route.tolist()
     
     def nearest_neighbor_heuristic(self, distance_matrix: np.ndarray, start_index: int = 0) -> List[int]:
         """Pure nearest neighbor heuristic"""
-        n_nodes = len(distance_matrix)
-        route = [start_index]
-        remaining = set(range(n_nodes))
-        remaining.remove(start_index)
-        
-        current = start_index
-        while remaining:
-            nearest = min(remaining, key=lambda x: distance_matrix[current][x])
-            route.append(nearest)
-            remaining.remove(nearest)
-            current = nearest
-        
-        return route
+        return _nearest_neighbor_njit(_as_kernel_matrix(distance_matrix), start_index).tolist()
     
-    def two_opt_swap(self, route: List[int]) -> List[int]:
-        """Perform a random 2-opt swap"""
-        n = len(route)
-        if n < 4:
-            return route
+    def nearest_neighbor_two_opt(self, distance_matrix: np.ndarray, start_index: int = 0,
+                                 neighbors: Optional[np.ndarray] = None) -> List[int]:
+        """
+        Cheap classical seed: best of several nearest neighbor tours refined by
+        2-opt; every tour is re-rooted so the seed starts at ``start_index``.
+        ``neighbors`` may pass in ``nearest_neighbor_lists`` already computed
+        """
+        distance_matrix = _as_kernel_matrix(distance_matrix)
+        n_nodes = len(distance_matrix)
         
-        i = np.random.randint(1, n - 1)
-        j = np.random.randint(i + 1, n)
+        # start_index plus starts spread evenly over the stops
+        starts = np.unique(np.append(
+            np.linspace(0, n_nodes - 1, min(n_nodes, _MULTISTART_RESTARTS), dtype=np.int64), start_index
+        ))
+        if neighbors is None:
+            neighbors = self.nearest_neighbor_lists(distance_matrix)
+        if neighbors is None:
+            neighbors = np.empty((n_nodes, 0), dtype=np.int64)
         
-        new_route = route.copy()
-        new_route[i:j+1] = new_route[i:j+1][::-1]
-        return new_route
+        with NUMBA_PARALLEL_LOCK:
+            routes, costs = _multistart_two_opt_njit(distance_matrix, starts, start_index, neighbors, 50)
+        return routes[np.argmin(costs)].tolist()
     
     def calculate_route_cost(self, route: List[int], distance_matrix: np.ndarray) -> float:
         """Calculate total cost of a route"""
         if len(route) < 2:
             return 0.0
         
-        total_cost = 0.0
-        for i in range(len(route) - 1):
-            total_cost += distance_matrix[route[i]][route[i + 1]]
+        route_arr = np.asarray(route, dtype=np.intp)
+        return float(distance_matrix[route_arr[:-1], route_arr[1:]].sum())
+    
+    def calculate_route_costs(self, routes: List[List[int]], distance_matrix: np.ndarray) -> np.ndarray:
+        """Calculate total cost of several equal-length routes at once"""
+        route_arr = np.asarray(routes, dtype=np.intp)
+        if route_arr.shape[1] < 2:
+            return np.zeros(len(route_arr))
         
-        return total_cost
\ No newline at end of file
+        return distance_matrix[route_arr[:, :-1], route_arr[:, 1:]].sum(axis=1)
+
+
+def _optimize_candidate(route: List[int], distance_matrix: np.ndarray,
+                        neighbors: Optional[np.ndarray] = None,
+                        seed: Optional[np.random.SeedSequence] = None) -> Tuple[List[int], float]:
+    """Process-pool entry point for ClassicalOptimizer.optimize_candidate"""
+    return ClassicalOptimizer().optimize_candidate(
+        route, distance_matrix, neighbors, np.random.default_rng(seed)
+    )
\ No newline at end of file
@@ -1,8 +1,14 @@
-import pymysql
+import MySQLdb
+from MySQLdb.cursors import DictCursor
+import json
 import logging
-from typing import Optional
+import struct
+from typing import Optional, List, Tuple, Any
 import os
 from dotenv import load_dotenv
+from dbutils.pooled_db import PooledDB
+
+from utils import worker_share
 
 load_dotenv()
 
@@ -18,15 +24,237 @@ DB_CONFIG = {
     'autocommit': False
 }
 
+# Connection pool sizing; the default ceiling matches the 40-thread pool that
+# FastAPI runs sync handlers on, split across server processes so all of them
+# together stay well below MySQL's default max_connections (151)
+POOL_CONFIG = {
+    'mincached': int(os.getenv('DB_POOL_MIN_CACHED', '2')),
+    'maxcached': int(os.getenv('DB_POOL_MAX_CACHED', str(worker_share(16)))),
+    'maxconnections': int(os.getenv('DB_POOL_MAX_CONNECTIONS', str(worker_share(40)))),
+    'blocking': True,
+    'ping': 1
+}
+
+# Shared connection pool, created on first use so init_db can create the database first
+_pool: Optional[PooledDB] = None
+
+def get_pool() -> PooledDB:
+    """Get the shared database connection pool"""
+    global _pool
+    if _pool is None:
+        _pool = PooledDB(creator=MySQLdb, **POOL_CONFIG, **DB_CONFIG)
+        logger.info(f"Database pool created (max {POOL_CONFIG['maxconnections']} connections)")
+    return _pool
+
 def get_db_connection():
-    """Get database connection"""
+    """Get a pooled database connection; close() returns it to the pool"""
     try:
-        connection = pymysql.connect(**DB_CONFIG)
+        connection = get_pool().connection()
         return connection
     except Exception as e:
         logger.error(f"Database connection failed: {str(e)}")
         raise
 
+# Fixed-arity IN lists; ID lists are padded with NULLs up to the next bucket so
+# only a handful of distinct statement texts ever reach the server
+IN_QUERY_BUCKETS = (16, 64, 256)
+
+# Columns the optimizer needs: the stop fields returned to clients, followed by
+# the precomputed radian coordinates
+STOP_FIELDS = ('id', 'name', 'latitude', 'longitude')
+
+# Length of stops.name (VARCHAR(100)); longer names are rejected in strict mode
+STOP_NAME_MAX_LENGTH = 100
+_SELECT_STOPS_BY_ID = {
+    size: f"SELECT {', '.join(STOP_FIELDS)}, lat_rad, lng_rad FROM stops "
+          f"WHERE id IN ({','.join(['%s'] * size)}) ORDER BY id"
+    for size in IN_QUERY_BUCKETS
+}
+
+def select_stops_by_ids(connection, stop_ids: List[int]) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    """Fetch (STOP_FIELDS..., lat_rad, lng_rad) rows ordered by ID, returning (column names, rows)"""
+    stop_ids = sorted(stop_ids)
+    largest = IN_QUERY_BUCKETS[-1]
+    columns, rows = [], []
+    cursor = connection.cursor()
+    try:
+        for offset in range(0, len(stop_ids), largest):
+            ids = stop_ids[offset:offset + largest]
+            size = next(bucket for bucket in IN_QUERY_BUCKETS if bucket >= len(ids))
+            cursor.execute(_SELECT_STOPS_BY_ID[size], ids + [None] * (size - len(ids)))
+            rows.extend(cursor.fetchall())
+            columns = [desc[0] for desc in cursor.description]
+        return columns, rows
+    finally:
+        cursor.close()
+
+def pack_route(route: List[int]) -> bytes:
+    """Pack a route as little-endian uint32 stop indices for route_data"""
+    return struct.pack(f'<{len(route)}I', *route)
+
+def unpack_route(blob: bytes) -> List[int]:
+    """Inverse of pack_route"""
+    return list(struct.unpack(f'<{len(blob) // 4}I', blob))
+
+def get_stops_version(connection) -> int:
+    """Counter bumped by every write to the stops table, shared by all server processes"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT version FROM stops_version WHERE id = 1")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+def bump_stops_version(cursor):
+    """Invalidate stop-derived caches; call inside the transaction that writes stops"""
+    cursor.execute("UPDATE stops_version SET version = version + 1 WHERE id = 1")
+
+def migrate_stops_table(cursor):
+    """
+    Bring an existing stops table up to the current schema: DOUBLE coordinates,
+    generated radian and geohash columns, and the geohash index in place of
+    the old (latitude, longitude) one
+    """
+    cursor.execute("""
+        SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'stops'
+    """)
+    column_types = {name: data_type.lower() for name, data_type in cursor.fetchall()}
+    
+    if column_types.get('latitude') != 'double' or column_types.get('longitude') != 'double':
+        cursor.execute("""
+            ALTER TABLE stops
+                MODIFY latitude DOUBLE NOT NULL,
+                MODIFY longitude DOUBLE NOT NULL
+        """)
+        logger.info("Converted stops coordinates to DOUBLE")
+    
+    if 'lat_rad' not in column_types:
+        cursor.execute("""
+            ALTER TABLE stops
+                ADD COLUMN lat_rad DOUBLE GENERATED ALWAYS AS (RADIANS(latitude)) STORED AFTER longitude,
+                ADD COLUMN lng_rad DOUBLE GENERATED ALWAYS AS (RADIANS(longitude)) STORED AFTER lat_rad
+        """)
+        logger.info("Added lat_rad/lng_rad columns to stops")
+    
+    if 'geohash' not in column_types:
+        cursor.execute("""
+            ALTER TABLE stops
+                ADD COLUMN geohash CHAR(12) GENERATED ALWAYS AS (ST_GeoHash(longitude, latitude, 12)) STORED AFTER lng_rad,
+                ADD INDEX idx_geohash (geohash)
+        """)
+        logger.info("Added geohash column and index to stops")
+    
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'stops'
+          AND INDEX_NAME = 'idx_coords'
+    """)
+    if cursor.fetchone()[0]:
+        cursor.execute("ALTER TABLE stops DROP INDEX idx_coords")
+        logger.info("Dropped idx_coords from stops")
+
+def _column_type(cursor, table: str, column: str) -> Optional[str]:
+    cursor.execute("""
+        SELECT DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    row = cursor.fetchone()
+    return row[0].lower() if row else None
+
+def migrate_route_data(cursor):
+    """Convert a textual (JSON) route_data column to packed binary
+    
+    DDL auto-commits, so every row is parsed before the schema is touched and
+    the packed routes are backfilled into a side column that replaces
+    route_data in a single ALTER; a failure at any point leaves the original
+    column intact and the migration is simply retried on the next start.
+    """
+    data_type = _column_type(cursor, 'optimization_results', 'route_data')
+    if data_type is None or data_type == 'blob':
+        return
+    
+    cursor.execute("SELECT id, route_data FROM optimization_results")
+    backfill = []
+    for result_id, route_data in cursor.fetchall():
+        if isinstance(route_data, bytes):
+            route_data = route_data.decode('utf-8')
+        backfill.append((pack_route(json.loads(route_data)), result_id))
+    
+    # Left behind by an interrupted earlier attempt
+    if _column_type(cursor, 'optimization_results', 'route_data_packed') is not None:
+        cursor.execute("ALTER TABLE optimization_results DROP COLUMN route_data_packed")
+    cursor.execute("ALTER TABLE optimization_results ADD COLUMN route_data_packed BLOB NULL AFTER route_data")
+    cursor.executemany("UPDATE optimization_results SET route_data_packed = %s WHERE id = %s", backfill)
+    cursor.execute("""
+        ALTER TABLE optimization_results
+            DROP COLUMN route_data,
+            CHANGE route_data_packed route_data BLOB NOT NULL
+    """)
+    logger.info(f"Migrated route_data to packed binary ({len(backfill)} rows)")
+
+_INSERT_STOP = "INSERT INTO stops (name, latitude, longitude) VALUES (%s, %s, %s)"
+
+def bulk_insert_stops(connection, rows: List[Tuple[str, float, float]]) -> int:
+    """Insert (name, latitude, longitude) rows in a single transaction
+    
+    If the server rejects the batch, the rows are retried one at a time and
+    the ones it refuses are skipped. Returns the number of rows inserted.
+    """
+    if not rows:
+        return 0
+    
+    cursor = connection.cursor()
+    try:
+        try:
+            cursor.executemany(_INSERT_STOP, rows)
+            inserted = cursor.rowcount
+        except MySQLdb.DatabaseError as e:
+            connection.rollback()
+            logger.warning(f"Batch insert of {len(rows)} stops failed ({str(e)}), retrying row by row")
+            inserted = 0
+            for row in rows:
+                try:
+                    cursor.execute(_INSERT_STOP, row)
+                    inserted += 1
+                except MySQLdb.DatabaseError as e:
+                    logger.warning(f"Failed to add stop {row[0]}: {str(e)}")
+        bump_stops_version(cursor)
+        connection.commit()
+        return inserted
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def bulk_insert_optimization_results(connection, rows: List[Tuple[Any, ...]]) -> int:
+    """Insert optimization result rows in a single transaction
+    
+    Each row is (route_data, total_distance, computation_time, backend_used,
+    optimization_level, stop_count).
+    """
+    if not rows:
+        return 0
+    
+    cursor = connection.cursor()
+    try:
+        cursor.executemany(
+            """
+            INSERT INTO optimization_results
+                (route_data, total_distance, computation_time, backend_used, optimization_level, stop_count)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            rows
+        )
+        connection.commit()
+        return cursor.rowcount
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
 def init_db():
     """Initialize database with required tables"""
     try:
@@ -34,7 +262,7 @@ def init_db():
         config_without_db = DB_CONFIG.copy()
         database_name = config_without_db.pop('database')
         
-        connection = pymysql.connect(**config_without_db)
+        connection = MySQLdb.connect(**config_without_db)
         cursor = connection.cursor()
         
         # Create database if it doesn't exist
@@ -46,15 +274,24 @@ def init_db():
         connection = get_db_connection()
         cursor = connection.cursor()
         
+        # Every server process runs this at startup; serialize them so only one
+        # applies the migrations below
+        cursor.execute("SELECT GET_LOCK('quantum_routing_init', 60)")
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Timed out waiting for another process to initialize the database")
+        
         # Create stops table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS stops (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 name VARCHAR(100) NOT NULL,
-                latitude DECIMAL(10, 8) NOT NULL,
-                longitude DECIMAL(11, 8) NOT NULL,
+                latitude DOUBLE NOT NULL,
+                longitude DOUBLE NOT NULL,
+                lat_rad DOUBLE GENERATED ALWAYS AS (RADIANS(latitude)) STORED,
+                lng_rad DOUBLE GENERATED ALWAYS AS (RADIANS(longitude)) STORED,
+                geohash CHAR(12) GENERATED ALWAYS AS (ST_GeoHash(longitude, latitude, 12)) STORED,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_coords (latitude, longitude)
+                INDEX idx_geohash (geohash)
             )
         """)
         
@@ -62,7 +299,7 @@ def init_db():
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS optimization_results (
                 id INT AUTO_INCREMENT PRIMARY KEY,
-                route_data JSON NOT NULL,
+                route_data BLOB NOT NULL,
                 total_distance DECIMAL(10, 2) NOT NULL,
                 computation_time DECIMAL(8, 4) NOT NULL,
                 backend_used VARCHAR(50) NOT NULL,
@@ -74,7 +311,20 @@ def init_db():
             )
         """)
         
+        # Single-row change counter for the stops table (see get_stops_version)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stops_version (
+                id TINYINT PRIMARY KEY,
+                version BIGINT NOT NULL
+            )
+        """)
+        cursor.execute("INSERT IGNORE INTO stops_version (id, version) VALUES (1, 0)")
+        
+        migrate_stops_table(cursor)
+        migrate_route_data(cursor)
+        
         connection.commit()
+        cursor.execute("SELECT RELEASE_LOCK('quantum_routing_init')")
         cursor.close()
         connection.close()
         
@@ -1,20 +1,30 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-import pandas as pd
-import io
+import asyncio
+import codecs
+import csv
+import functools
+import itertools
+import os
+import threading
+import numpy as np
 import base64
 from PIL import Image
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import logging
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 
-from models import Stop, OptimizationRequest, OptimizationResponse, RouteResult
-from database import init_db, get_db_connection
-from quantum_layer import QuantumLayer
-from classical_optimizer import ClassicalOptimizer
-from utils import calculate_distance_matrix
+from models import Stop, OptimizationRequest, OptimizationResponse, RouteResult, RouteSummary
+from database import (
+    init_db, get_db_connection, DictCursor, select_stops_by_ids, STOP_FIELDS,
+    get_stops_version, bump_stops_version, bulk_insert_stops, STOP_NAME_MAX_LENGTH, bulk_insert_optimization_results, pack_route, unpack_route
+)
+from quantum_layer import QuantumLayer, QAOAScheduler
+from classical_optimizer import ClassicalOptimizer, HELD_KARP_MAX_STOPS
+from utils import calculate_distance_matrix, validate_coordinates_batch, worker_share
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,13 +35,25 @@ async def lifespan(app: FastAPI):
     # Initialize database on startup
     init_db()
     logger.info("Database initialized")
+    # Load the classical kernels and build the quantum layer in worker threads
+    # so startup isn't held up; the scheduler's workers wait for the layer
+    warm_up = asyncio.get_running_loop().run_in_executor(None, warm_up_classical_optimizer)
+    warm_up.add_done_callback(log_warm_up_failure)
+    await qaoa_scheduler.start()
+    results_writer = asyncio.create_task(write_optimization_results())
     yield
+    await asyncio.gather(warm_up, return_exceptions=True)
+    # Stop producing work before the writer makes its final flush
+    await qaoa_scheduler.stop()
+    results_writer.cancel()
+    await asyncio.gather(results_writer, return_exceptions=True)
 
 app = FastAPI(
     title="Quantum Path Planning API",
     description="Quantum-powered route optimization for delivery vehicles using QAOA",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -43,16 +65,211 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize quantum and classical layers
-quantum_layer = QuantumLayer()
-classical_optimizer = ClassicalOptimizer()
+# Quantum and classical layers are created once, on first use; lru_cache alone
+# would let two threads run the constructors concurrently (the quantum one
+# authenticates against IBM runtime)
+_quantum_layer_lock = threading.Lock()
+_classical_optimizer_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def _quantum_layer() -> QuantumLayer:
+    return QuantumLayer()
+
+@functools.lru_cache(maxsize=None)
+def _classical_optimizer() -> ClassicalOptimizer:
+    return ClassicalOptimizer()
+
+def get_quantum_layer() -> QuantumLayer:
+    with _quantum_layer_lock:
+        return _quantum_layer()
+
+def get_classical_optimizer() -> ClassicalOptimizer:
+    with _classical_optimizer_lock:
+        return _classical_optimizer()
+
+def warm_up_classical_optimizer():
+    """Load or compile the Held-Karp and 2-opt kernels before the first request needs them"""
+    optimizer = get_classical_optimizer()
+    points = np.random.default_rng(0).random((5, 2), dtype=np.float32)
+    distance_matrix = np.linalg.norm(points[:, None] - points[None, :], axis=-1)
+    optimizer.held_karp(distance_matrix)
+    optimizer.nearest_neighbor_two_opt(distance_matrix)
+
+def log_warm_up_failure(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Classical optimizer warm-up failed: {future.exception()}")
+
+qaoa_scheduler = QAOAScheduler(get_quantum_layer, num_workers=int(os.getenv('QAOA_WORKERS', '4')))
+
+# Optimization results are persisted off the request path in batches
+results_queue: asyncio.Queue = asyncio.Queue()
+RESULTS_BATCH_WINDOW = 0.05
+
+# Rows parsed and inserted per round trip when importing CSV uploads
+CSV_CHUNK_SIZE = 5000
+
+def insert_stop_records(records: List[tuple]) -> int:
+    """Bulk-insert (name, lat, lng) records on a pooled connection"""
+    connection = get_db_connection()
+    try:
+        return bulk_insert_stops(connection, records)
+    finally:
+        connection.close()
+
+def insert_valid_stop_records(records: List[tuple]) -> int:
+    """Insert the records the stops schema accepts, logging the rest"""
+    valid = validate_coordinates_batch([record[1:] for record in records])
+    valid &= np.fromiter(
+        (bool(name and name.strip()) and len(name) <= STOP_NAME_MAX_LENGTH for name, _, _ in records),
+        dtype=bool, count=len(records)
+    )
+    if not valid.all():
+        for record in itertools.compress(records, ~valid):
+            logger.warning(f"Failed to add stop {record[0]}: invalid name or coordinates")
+        records = list(itertools.compress(records, valid))
+    return insert_stop_records(records) if records else 0
+
+def insert_result_records(records: List[tuple]) -> int:
+    """Bulk-insert optimization result records on a pooled connection"""
+    connection = get_db_connection()
+    try:
+        return bulk_insert_optimization_results(connection, records)
+    finally:
+        connection.close()
+
+def drain_results_queue(batch: List[tuple]) -> List[tuple]:
+    """Move whatever is already queued into the batch"""
+    while not results_queue.empty():
+        batch.append(results_queue.get_nowait())
+    return batch
+
+async def save_results(batch: List[tuple]):
+    try:
+        await asyncio.to_thread(insert_result_records, batch)
+    except Exception as e:
+        logger.error(f"Failed to save {len(batch)} optimization results: {str(e)}")
+
+async def write_optimization_results():
+    """Background task committing queued optimization results with executemany"""
+    batch: List[tuple] = []
+    in_flight: Optional[asyncio.Future] = None
+    try:
+        while True:
+            batch.append(await results_queue.get())
+            # Let a burst of requests accumulate into one commit
+            await asyncio.sleep(RESULTS_BATCH_WINDOW)
+            drain_results_queue(batch)
+            # Shielded so that cancelling the writer mid-insert lets that write
+            # finish instead of abandoning it
+            in_flight = asyncio.ensure_future(save_results(batch))
+            batch = []
+            await asyncio.shield(in_flight)
+    finally:
+        # On shutdown, wait for the running insert, then flush anything
+        # already dequeued or still queued
+        if in_flight is not None:
+            await in_flight
+        drain_results_queue(batch)
+        if batch:
+            await save_results(batch)
+
+def import_stops_csv(reader: csv.DictReader, chunk_size: int = CSV_CHUNK_SIZE) -> Tuple[int, int]:
+    """Stream (name, lat, lng) rows from a CSV reader into the stops table
+    
+    Returns (rows added, rows skipped).
+    """
+    stops_added = 0
+    rows_read = 0
+    records = []
+    for row in reader:
+        rows_read += 1
+        try:
+            lat, lng = float(row['lat']), float(row['lng'])
+        except (TypeError, ValueError):
+            # Rows whose coordinates don't parse are skipped
+            logger.warning(f"Failed to add stop {row['name']}: invalid coordinates")
+            continue
+        
+        records.append((row['name'], lat, lng))
+        if len(records) >= chunk_size:
+            stops_added += insert_valid_stop_records(records)
+            records = []
+    
+    if records:
+        stops_added += insert_valid_stop_records(records)
+    return stops_added, rows_read - stops_added
+
+def load_distance_matrix(stop_ids: Tuple[int, ...]) -> Tuple[np.ndarray, List[dict]]:
+    """Stops and distance matrix for a sorted tuple of stop IDs, cached per stops version"""
+    connection = get_db_connection()
+    try:
+        version = get_stops_version(connection)
+    finally:
+        connection.close()
+    return cached_distance_matrix(stop_ids, version)
+
+# Cached matrices are O(n^2), so the cache is bounded by bytes rather than
+# entries; the budget is per server process
+DISTANCE_CACHE_BYTES = worker_share(int(os.getenv('DISTANCE_CACHE_MB', '512'))) * 2 ** 20
+_distance_cache: OrderedDict = OrderedDict()
+_distance_cache_bytes = 0
+_distance_cache_lock = threading.Lock()
+
+def cached_distance_matrix(stop_ids: Tuple[int, ...], stops_version: int) -> Tuple[np.ndarray, List[dict]]:
+    """
+    Stops and kernel-ready distance matrix for a sorted tuple of stop IDs
+    Repeat optimizations over the same stop set skip the query and the matrix
+    build. Every write to the stops table bumps ``stops_version`` in the
+    database, so entries go stale in all server processes at once.
+    """
+    global _distance_cache_bytes
+    key = (stop_ids, stops_version)
+    with _distance_cache_lock:
+        entry = _distance_cache.get(key)
+        if entry is not None:
+            _distance_cache.move_to_end(key)
+            return entry
+    
+    entry = build_distance_matrix(stop_ids)
+    size = entry[0].nbytes
+    with _distance_cache_lock:
+        if key in _distance_cache or size > DISTANCE_CACHE_BYTES:
+            return entry
+        # Entries for an older stops version can never be hit again
+        for stale in [k for k in _distance_cache if k[1] < stops_version]:
+            _distance_cache_bytes -= _distance_cache.pop(stale)[0].nbytes
+        while _distance_cache and _distance_cache_bytes + size > DISTANCE_CACHE_BYTES:
+            _distance_cache_bytes -= _distance_cache.popitem(last=False)[1][0].nbytes
+        _distance_cache[key] = entry
+        _distance_cache_bytes += size
+    return entry
+
+def build_distance_matrix(stop_ids: Tuple[int, ...]) -> Tuple[np.ndarray, List[dict]]:
+    """Query the stops and build their distance matrix (see cached_distance_matrix)"""
+    connection = get_db_connection()
+    try:
+        _, rows = select_stops_by_ids(connection, list(stop_ids))
+    finally:
+        connection.close()
+    
+    # Rows are the client-facing stop fields followed by (lat_rad, lng_rad)
+    n_fields = len(STOP_FIELDS)
+    coordinates = np.array([row[n_fields:] for row in rows], dtype=np.float64).reshape(-1, 2)
+    stops_data = [dict(zip(STOP_FIELDS, row)) for row in rows]
+    
+    # Built directly in the layout every optimizer kernel expects (C-contiguous
+    # float32), so no request path has to convert or copy it again
+    distance_matrix = calculate_distance_matrix(coordinates, units='radians', dtype=np.float32)
+    # Shared between requests, so guard against in-place edits
+    distance_matrix.setflags(write=False)
+    return distance_matrix, stops_data
 
 @app.get("/")
 async def root():
     return {"message": "Quantum Path Planning API", "status": "active"}
 
 @app.post("/api/stops", response_model=dict)
-async def add_stop(stop: Stop):
+def add_stop(stop: Stop):
     """Add a new stop manually"""
     try:
         connection = get_db_connection()
@@ -62,8 +279,9 @@ async def add_stop(stop: Stop):
             "INSERT INTO stops (name, latitude, longitude) VALUES (%s, %s, %s)",
             (stop.name, stop.latitude, stop.longitude)
         )
-        connection.commit()
         stop_id = cursor.lastrowid
+        bump_stops_version(cursor)
+        connection.commit()
         
         cursor.close()
         connection.close()
@@ -80,58 +298,36 @@ async def upload_stops_csv(file: UploadFile = File(...)):
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="File must be a CSV")
         
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+        # Parse the spooled upload incrementally so peak memory stays bounded
+        reader = csv.DictReader(codecs.iterdecode(file.file, 'utf-8'))
         
         # Validate CSV columns
         required_columns = ['name', 'lat', 'lng']
-        if not all(col in df.columns for col in required_columns):
+        if not set(required_columns).issubset(reader.fieldnames or []):
             raise HTTPException(
                 status_code=400, 
                 detail=f"CSV must contain columns: {required_columns}"
             )
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        stops_added = 0
-        for _, row in df.iterrows():
-            try:
-                cursor.execute(
-                    "INSERT INTO stops (name, latitude, longitude) VALUES (%s, %s, %s)",
-                    (row['name'], float(row['lat']), float(row['lng']))
-                )
-                stops_added += 1
-            except Exception as e:
-                logger.warning(f"Failed to add stop {row['name']}: {str(e)}")
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
+        stops_added, stops_skipped = await asyncio.to_thread(import_stops_csv, reader)
         
-        return {"message": f"Successfully uploaded {stops_added} stops"}
+        message = f"Successfully uploaded {stops_added} stops"
+        if stops_skipped:
+            message += f" ({stops_skipped} invalid rows skipped)"
+        return {"message": message, "stops_added": stops_added, "stops_skipped": stops_skipped}
     except Exception as e:
         logger.error(f"Error uploading CSV: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to upload CSV: {str(e)}")
 
 @app.get("/api/stops", response_model=List[dict])
-async def get_stops():
+def get_stops():
     """Get all stops"""
     try:
         connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        cursor.execute("SELECT * FROM stops ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        
-        # Get column names
-        columns = [desc[0] for desc in cursor.description]
+        cursor = connection.cursor(DictCursor)
         
-        # Convert to list of dictionaries
-        stops = []
-        for row in rows:
-            stop_dict = dict(zip(columns, row))
-            stops.append(stop_dict)
+        cursor.execute(f"SELECT {', '.join(STOP_FIELDS)}, created_at FROM stops ORDER BY created_at DESC")
+        stops = list(cursor.fetchall())
         
         cursor.close()
         connection.close()
@@ -142,7 +338,7 @@ async def get_stops():
         raise HTTPException(status_code=500, detail=f"Failed to fetch stops: {str(e)}")
 
 @app.delete("/api/stops/{stop_id}")
-async def delete_stop(stop_id: int):
+def delete_stop(stop_id: int):
     """Delete a stop"""
     try:
         connection = get_db_connection()
@@ -153,6 +349,7 @@ async def delete_stop(stop_id: int):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Stop not found")
         
+        bump_stops_version(cursor)
         connection.commit()
         cursor.close()
         connection.close()
@@ -171,76 +368,96 @@ async def optimize_route(request: OptimizationRequest):
         if len(request.stop_ids) < 2:
             raise HTTPException(status_code=400, detail="At least 2 stops required for optimization")
         
-        # Fetch stops from database
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        placeholders = ','.join(['%s'] * len(request.stop_ids))
-        cursor.execute(f"SELECT * FROM stops WHERE id IN ({placeholders})", request.stop_ids)
-        rows = cursor.fetchall()
-        
-        # Get column names and convert to dictionaries
-        columns = [desc[0] for desc in cursor.description]
-        stops_data = []
-        for row in rows:
-            stop_dict = dict(zip(columns, row))
-            stops_data.append(stop_dict)
-        
-        cursor.close()
-        connection.close()
+        # Fetch stops and distance matrix without blocking the event loop
+        stop_ids = tuple(sorted(set(request.stop_ids)))
+        distance_matrix, stops_data = await asyncio.to_thread(load_distance_matrix, stop_ids)
         
         if len(stops_data) != len(request.stop_ids):
             raise HTTPException(status_code=400, detail="Some stops not found")
         
-        # Calculate distance matrix
-        coordinates = [(stop['latitude'], stop['longitude']) for stop in stops_data]
-        distance_matrix = calculate_distance_matrix(coordinates)
-        
-        # Step 1: Run quantum optimization (QAOA)
-        logger.info("Starting quantum layer optimization...")
-        quantum_result = await quantum_layer.run_qaoa_circuit(distance_matrix)
-        
-        # Step 2: Classical post-processing
-        logger.info("Starting classical post-processing...")
-        if quantum_result['success']:
-            # Use quantum candidate routes for classical optimization
-            candidate_routes = [quantum_result['route']]
+        start_index = request.start_index or 0
+        force_quantum = request.quantum_backend == 'force'
+        if len(stops_data) <= HELD_KARP_MAX_STOPS and not force_quantum:
+            # Small routes are solved exactly and already start at the requested
+            # stop, so neither QAOA nor the heuristics have anything to add
+            # (quantum_backend="force" still runs the hybrid pipeline)
+            exact_start = start_index if start_index < len(stops_data) else 0
+            classical_result = await asyncio.to_thread(
+                get_classical_optimizer().held_karp, distance_matrix, exact_start
+            )
+            optimized_route = classical_result['route']
+            total_computation_time = classical_result['computation_time']
+            backend_desc = f"Classical ({classical_result['method']})"
         else:
-            # Fallback to pure classical if quantum fails
+            # Step 1: Run quantum optimization (QAOA) while a classical warm start
+            # is computed in a worker thread
+            logger.info("Starting quantum layer optimization...")
+            optimizer = get_classical_optimizer()
+            # Shared by the warm start and the post-processing 2-opt
+            neighbors = await asyncio.to_thread(optimizer.nearest_neighbor_lists, distance_matrix)
+            seed_route, quantum_result = await asyncio.gather(
+                asyncio.to_thread(
+                    optimizer.nearest_neighbor_two_opt, distance_matrix,
+                    start_index if start_index < len(stops_data) else 0, neighbors
+                ),
+                qaoa_scheduler.submit(distance_matrix),
+                return_exceptions=True
+            )
+            if isinstance(quantum_result, BaseException):
+                logger.error(f"Quantum layer failed: {str(quantum_result)}")
+                quantum_result = {'success': False, 'error': str(quantum_result), 'computation_time': 0}
+            
+            # Step 2: Classical post-processing
+            logger.info("Starting classical post-processing...")
             candidate_routes = []
-        
-        classical_result = classical_optimizer.heuristic_optimization(
-            candidate_routes, distance_matrix
-        )
-        
-        # Combine results
-        total_computation_time = quantum_result.get('computation_time', 0) + classical_result['computation_time']
-        
-        # Apply start index offset
-        start_index = request.start_index or 0
-        if start_index > 0 and start_index < len(classical_result['route']):
+            if quantum_result['success']:
+                # Use quantum candidate routes for classical optimization
+                candidate_routes.append(quantum_result['route'])
+            if isinstance(seed_route, BaseException):
+                logger.warning(f"Classical warm start failed: {str(seed_route)}")
+            else:
+                candidate_routes.append(seed_route)
+            
+            # Waits on the optimizer's process and thread pools, so keep it off the event loop
+            classical_result = await asyncio.to_thread(
+                optimizer.heuristic_optimization, candidate_routes, distance_matrix, neighbors
+            )
+            
+            # Combine results
+            total_computation_time = quantum_result.get('computation_time', 0) + classical_result['computation_time']
+            
+            # Apply start index offset; the classical seed already starts there,
+            # but a winning quantum candidate may not
             route = classical_result['route']
-            # Rotate route to start from specified index
-            start_pos = route.index(start_index) if start_index in route else 0
-            optimized_route = route[start_pos:] + route[:start_pos]
-        else:
-            optimized_route = classical_result['route']
+            if start_index < len(route) and route[0] != start_index:
+                # Rotate route to start from specified index
+                start_pos = route.index(start_index) if start_index in route else 0
+                optimized_route = route[start_pos:] + route[:start_pos]
+            else:
+                optimized_route = route
+            
+            # Determine backend description
+            if quantum_result['success']:
+                backend_desc = f"Hybrid (Quantum QAOA + {classical_result['method']})"
+            else:
+                backend_desc = f"Classical Fallback ({classical_result['method']})"
         
         # Prepare response
         optimized_stops = [stops_data[i] for i in optimized_route]
         
         # Calculate total distance
-        total_distance = 0
-        for i in range(len(optimized_route) - 1):
-            from_idx = optimized_route[i]
-            to_idx = optimized_route[i + 1]
-            total_distance += distance_matrix[from_idx][to_idx]
-        
-        # Determine backend description
-        if quantum_result['success']:
-            backend_desc = f"Hybrid (Quantum QAOA + {classical_result['method']})"
-        else:
-            backend_desc = f"Classical Fallback ({classical_result['method']})"
+        route_arr = np.asarray(optimized_route, dtype=np.intp)
+        total_distance = float(distance_matrix[route_arr[:-1], route_arr[1:]].sum())
+        
+        # Save result (best-effort, written by the background task)
+        results_queue.put_nowait((
+            pack_route(optimized_route),
+            round(total_distance, 2),
+            float(total_computation_time),
+            backend_desc[:50],  # backend_used is VARCHAR(50)
+            request.optimization_level or 1,
+            len(stops_data)
+        ))
         
         return OptimizationResponse(
             success=True,
@@ -258,26 +475,21 @@ async def optimize_route(request: OptimizationRequest):
         logger.error(f"Error in optimization: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
 
-@app.get("/api/routes", response_model=List[RouteResult])
-async def get_optimization_history():
-    """Get optimization history"""
+@app.get("/api/routes", response_model=List[RouteSummary])
+def get_optimization_history(limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
+    """Get a page of optimization history (summary fields only)"""
     try:
         connection = get_db_connection()
-        cursor = connection.cursor()
+        cursor = connection.cursor(DictCursor)
         
         cursor.execute("""
-            SELECT * FROM optimization_results 
-            ORDER BY created_at DESC 
-            LIMIT 50
-        """)
-        rows = cursor.fetchall()
-        
-        # Get column names and convert to dictionaries
-        columns = [desc[0] for desc in cursor.description]
-        results = []
-        for row in rows:
-            result_dict = dict(zip(columns, row))
-            results.append(result_dict)
+            SELECT id, total_distance, computation_time, backend_used,
+                   optimization_level, stop_count, created_at
+            FROM optimization_results 
+            ORDER BY id DESC 
+            LIMIT %s OFFSET %s
+        """, (limit, offset))
+        results = list(cursor.fetchall())
         
         cursor.close()
         connection.close()
@@ -287,6 +499,43 @@ async def get_optimization_history():
         logger.error(f"Error fetching optimization history: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch history: {str(e)}")
 
+@app.get("/api/routes/{result_id}", response_model=RouteResult)
+def get_optimization_result(result_id: int):
+    """Get a single optimization result including its route"""
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor(DictCursor)
+        
+        cursor.execute("""
+            SELECT id, route_data, total_distance, computation_time, backend_used, created_at
+            FROM optimization_results
+            WHERE id = %s
+        """, (result_id,))
+        result = cursor.fetchone()
+        
+        cursor.close()
+        connection.close()
+        
+        if result is None:
+            raise HTTPException(status_code=404, detail="Optimization result not found")
+        
+        result['route_data'] = unpack_route(result['route_data'])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching optimization result: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch result: {str(e)}")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # uvloop + httptools; UVICORN_WORKERS adds server processes (per-process
+    # pools shrink to match) and UVICORN_RELOAD=1 switches to a single
+    # auto-reloading process for development
+    reload = os.getenv('UVICORN_RELOAD', '').lower() in ('1', 'true')
+    uvicorn.run(
+        "main:app", host="0.0.0.0", port=8000,
+        reload=reload,
+        workers=1 if reload else int(os.getenv('UVICORN_WORKERS', '1')),
+        loop="uvloop", http="httptools"
+    )
\ No newline at end of file
@@ -34,6 +34,15 @@ class OptimizationResponse(BaseModel):
     optimization_level: int
     message: Optional[str] = None
 
+class RouteSummary(BaseModel):
+    id: int
+    total_distance: float
+    computation_time: float
+    backend_used: str
+    optimization_level: int
+    stop_count: int
+    created_at: datetime
+
 class RouteResult(BaseModel):
     id: int
     route_data: Any
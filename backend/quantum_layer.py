@@ -2,16 +2,24 @@
 Quantum Layer - Handles QAOA quantum optimization
 Separated from classical optimization as per interaction diagram
 """
+import asyncio
+import functools
 import numpy as np
 from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter, ParameterVector
 from qiskit.primitives import Sampler
-from qiskit_ibm_runtime import QiskitRuntimeService, Session, Sampler as RuntimeSampler
 import time
 import logging
 import os
-from typing import List, Tuple, Dict, Any
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
+from typing import List, Tuple, Dict, Any, Callable, Optional
 from dotenv import load_dotenv
 
+from utils import start_process_pool, worker_share
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -22,15 +30,52 @@ class QuantumLayer:
     Handles quantum circuit creation and execution
     """
     
-    def __init__(self):
+    def __init__(self, connect_service: bool = True):
         self.ibm_token = os.getenv('IBM_QUANTUM_TOKEN')
         self.service = None
-        self.setup_quantum_service()
+        self._executor = None
+        # The pool is started lazily and may be replaced if its workers die
+        self._executor_lock = threading.Lock()
+        self._templates = {}
+        if connect_service:
+            self.setup_quantum_service()
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Lazily start the worker pool used for the parameter sweep"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = start_process_pool(worker_share(os.cpu_count() or 1))
+            return self._executor
+    
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Drop a broken pool so the next sweep starts a fresh one"""
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+    
+    async def _sweep_parameters(self, distance_matrix: np.ndarray, batches: List[List[Tuple]]) -> List[List]:
+        """Evaluate parameter batches on the worker pool, restarting it once if it has broken"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return await asyncio.gather(*(
+                    loop.run_in_executor(executor, _evaluate_parameters, distance_matrix, batch)
+                    for batch in batches
+                ))
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                if attempt:
+                    raise
+                logger.warning("QAOA worker pool broke; restarting it")
     
     def setup_quantum_service(self):
         """Setup IBM Quantum service if token is available"""
         if self.ibm_token:
             try:
+                # Imported here so classical-only workers skip the runtime client's startup cost
+                from qiskit_ibm_runtime import QiskitRuntimeService
                 self.service = QiskitRuntimeService(
                     token=self.ibm_token,
                     channel='ibm_quantum'
@@ -42,77 +87,79 @@ class QuantumLayer:
         else:
             logger.info("No IBM Quantum token provided, using local simulator")
     
+    def qaoa_template(self, n_qubits: int, depth: int) -> Tuple[QuantumCircuit, ParameterVector, Parameter]:
+        """Parameterized QAOA circuit, built once per (n_qubits, depth) and reused"""
+        key = (n_qubits, depth)
+        if key not in self._templates:
+            n_coupled = n_qubits // 2
+            pair_angles = ParameterVector('gamma_w', n_coupled * (n_coupled - 1) // 2)
+            beta = Parameter('beta')
+            
+            qc = QuantumCircuit(n_qubits)
+            
+            # Initial superposition
+            for i in range(n_qubits):
+                qc.ry(np.pi/4, i)
+            
+            # QAOA layers
+            for layer in range(depth):
+                # Cost Hamiltonian (gamma layer); one angle per coupled pair
+                pair = 0
+                for i in range(n_coupled):
+                    for j in range(i + 1, n_coupled):
+                        qc.rzz(pair_angles[pair] * (layer + 1), i, j)
+                        pair += 1
+                
+                # Mixer Hamiltonian (beta layer)
+                for i in range(n_qubits):
+                    qc.rx(2 * beta / (layer + 1), i)
+                    if i < n_qubits - 1:
+                        qc.cnot(i, i + 1)
+            
+            qc.measure_all()
+            self._templates[key] = (qc, pair_angles, beta)
+        
+        return self._templates[key]
+    
     def create_qaoa_circuit(self, distance_matrix: np.ndarray, gamma: float, beta: float, depth: int = 2) -> QuantumCircuit:
         """Create QAOA quantum circuit for TSP optimization"""
         n_nodes = len(distance_matrix)
         n_qubits = min(n_nodes * 2, 20)  # Limit qubits for practical simulation
+        qc, pair_angles, beta_param = self.qaoa_template(n_qubits, depth)
         
-        qc = QuantumCircuit(n_qubits)
-        
-        # Initial superposition
-        for i in range(n_qubits):
-            qc.ry(np.pi/4, i)
-        
-        # QAOA layers
-        for layer in range(depth):
-            # Cost Hamiltonian (gamma layer)
-            for i in range(min(n_nodes, n_qubits//2)):
-                for j in range(i + 1, min(n_nodes, n_qubits//2)):
-                    if i < n_qubits and j < n_qubits:
-                        weight = np.exp(-distance_matrix[i][j] / np.mean(distance_matrix))
-                        qc.rzz(gamma * weight * (layer + 1), i, j)
-            
-            # Mixer Hamiltonian (beta layer)
-            for i in range(n_qubits):
-                qc.rx(2 * beta / (layer + 1), i)
-                if i < n_qubits - 1:
-                    qc.cnot(i, i + 1)
+        # Edge weights for the coupled pairs, in the template's (i, j > i) order
+        n_coupled = n_qubits // 2
+        mean_distance = float(np.mean(distance_matrix))
+        weights = np.exp(-np.asarray(distance_matrix)[:n_coupled, :n_coupled] / mean_distance)
+        pair_weights = weights[np.triu_indices(n_coupled, k=1)]
         
-        qc.measure_all()
-        return qc
+        return qc.assign_parameters({
+            pair_angles: (gamma * pair_weights).tolist(),
+            beta_param: beta
+        })
     
     async def run_qaoa_circuit(self, distance_matrix: np.ndarray) -> Dict[str, Any]:
         """Run QAOA circuit and return quantum results"""
         start_time = time.time()
+        # float32 is plenty for weights and costs and halves what is shipped to the workers
+        distance_matrix = np.ascontiguousarray(distance_matrix, dtype=np.float32)
         
         try:
             # Optimize QAOA parameters
-            best_result = None
-            best_cost = float('inf')
-            
             parameter_sets = [
                 (0.8, 1.2, 2), (1.2, 0.8, 2), (1.0, 1.0, 3),
                 (0.6, 1.0, 2), (1.0, 0.6, 2), (0.8, 0.8, 2)
             ]
             
-            for gamma, beta, depth in parameter_sets:
-                qc = self.create_qaoa_circuit(distance_matrix, gamma, beta, depth)
-                
-                # Use local sampler with more shots
-                sampler = Sampler()
-                job = sampler.run(qc, shots=2000)
-                result = job.result()
-                
-                # Get measurement counts
-                if hasattr(result, 'quasi_dists') and result.quasi_dists:
-                    counts = result.quasi_dists[0]
-                    counts_dict = {format(int(k), f'0{qc.num_qubits}b'): int(v * 2000) 
-                                 for k, v in counts.items()}
-                else:
-                    counts_dict = {'0' * qc.num_qubits: 2000}
-                
-                # Evaluate this parameter set
-                candidate_routes = self.decode_quantum_results(counts_dict, len(distance_matrix))
-                for route in candidate_routes[:3]:  # Try top 3 candidates
-                    cost = self.calculate_route_cost(route, distance_matrix)
-                    if cost < best_cost:
-                        best_cost = cost
-                        best_result = {
-                            'route': route,
-                            'cost': cost,
-                            'counts': counts_dict,
-                            'parameters': {'gamma': gamma, 'beta': beta, 'depth': depth}
-                        }
+            # Parameter sets are independent samples, so fan them out across
+            # processes; each process samples its share in one batched call
+            n_batches = min(len(parameter_sets), worker_share(os.cpu_count() or 1))
+            batch_size = -(-len(parameter_sets) // n_batches)
+            batches = [parameter_sets[i:i + batch_size] for i in range(0, len(parameter_sets), batch_size)]
+            
+            batch_results = await self._sweep_parameters(distance_matrix, batches)
+            results = [result for batch in batch_results for result in batch if result is not None]
+            best_result = min(results, key=itemgetter('cost')) if results else None
             
             computation_time = time.time() - start_time
             
@@ -137,7 +184,46 @@ class QuantumLayer:
                 'computation_time': time.time() - start_time
             }
     
-    def decode_quantum_results(self, counts: dict, n_nodes: int) -> List[List[int]]:
+    def evaluate_parameters(self, distance_matrix: np.ndarray,
+                            parameter_sets: List[Tuple[float, float, int]]) -> List[Optional[Dict[str, Any]]]:
+        """Sample the circuits for several parameter sets in one sampler call and
+        keep the cheapest decoded route of each"""
+        circuits = [
+            self.create_qaoa_circuit(distance_matrix, gamma, beta, depth)
+            for gamma, beta, depth in parameter_sets
+        ]
+        
+        # Use local sampler with more shots
+        sampler = Sampler()
+        job = sampler.run(circuits, shots=2000)
+        result = job.result()
+        quasi_dists = getattr(result, 'quasi_dists', None) or [None] * len(circuits)
+        
+        best_results = []
+        for (gamma, beta, depth), qc, counts in zip(parameter_sets, circuits, quasi_dists):
+            # Get measurement counts, keyed by the integer measurement outcome
+            if counts:
+                counts_dict = {int(k): int(v * 2000) for k, v in counts.items()}
+            else:
+                counts_dict = {0: 2000}
+            
+            # Evaluate this parameter set
+            best_result = None
+            candidate_routes = self.decode_quantum_results(counts_dict, qc.num_qubits, len(distance_matrix))
+            for route in candidate_routes[:3]:  # Try top 3 candidates
+                cost = self.calculate_route_cost(route, distance_matrix)
+                if best_result is None or cost < best_result['cost']:
+                    best_result = {
+                        'route': route,
+                        'cost': cost,
+                        'counts': counts_dict,
+                        'parameters': {'gamma': gamma, 'beta': beta, 'depth': depth}
+                    }
+            best_results.append(best_result)
+        
+        return best_results
+    
+    def decode_quantum_results(self, counts: Dict[int, int], n_qubits: int, n_nodes: int) -> List[List[int]]:
         """Decode quantum measurement results into candidate routes"""
         candidate_routes = []
         
@@ -145,9 +231,9 @@ class QuantumLayer:
         sorted_counts = sorted(counts.items(), key=lambda x: x[1], reverse=True)
         top_results = sorted_counts[:min(10, len(sorted_counts))]
         
-        for bitstring, count in top_results:
-            # Convert bitstring to route using quantum-inspired heuristics
-            route = self.bitstring_to_route(bitstring, n_nodes)
+        for outcome, count in top_results:
+            # Convert outcome to route using quantum-inspired heuristics
+            route = self.bitstring_to_route(outcome, n_qubits, n_nodes)
             if self.is_valid_route(route, n_nodes):
                 candidate_routes.append(route)
         
@@ -157,27 +243,27 @@ class QuantumLayer:
         
         return candidate_routes
     
-    def bitstring_to_route(self, bitstring: str, n_nodes: int) -> List[int]:
-        """Convert quantum bitstring to route using quantum bias"""
-        seed = int(bitstring, 2) % 10000
-        np.random.seed(seed)
+    def bitstring_to_route(self, outcome: int, n_qubits: int, n_nodes: int) -> List[int]:
+        """Convert a measured outcome (n_qubits-bit integer) to route using quantum bias"""
+        # Local generator: deterministic per outcome without touching global RNG state
+        rng = np.random.default_rng(outcome % 10000)
         
         route = [0]  # Start from node 0
         remaining = list(range(1, n_nodes))
         
-        # Use bitstring to bias selection
+        # Use the outcome bits to bias selection
         for i in range(len(remaining)):
             if not remaining:
                 break
                 
-            # Use quantum bias from bitstring
-            bit_index = i % len(bitstring)
-            quantum_bias = 1 if bitstring[bit_index] == '1' else 0
+            # Use quantum bias from the outcome bits, most significant first
+            bit_index = i % n_qubits
+            quantum_bias = (outcome >> (n_qubits - 1 - bit_index)) & 1
             
             # Select next node with quantum bias
             if quantum_bias and len(remaining) > 1:
                 # Prefer nodes that would create shorter segments
-                next_node = remaining[np.random.randint(0, min(2, len(remaining)))]
+                next_node = remaining[rng.integers(0, min(2, len(remaining)))]
             else:
                 next_node = remaining[0]
             
@@ -197,8 +283,69 @@ class QuantumLayer:
         if len(route) < 2:
             return 0.0
         
-        total_cost = 0.0
-        for i in range(len(route) - 1):
-            total_cost += distance_matrix[route[i]][route[i + 1]]
-        
-        return total_cost
\ No newline at end of file
+        route_arr = np.asarray(route, dtype=np.intp)
+        return float(distance_matrix[route_arr[:-1], route_arr[1:]].sum())
+
+
+@functools.lru_cache(maxsize=None)
+def _worker_layer() -> QuantumLayer:
+    """Per-process layer for sweep workers; they only sample locally"""
+    return QuantumLayer(connect_service=False)
+
+
+def _evaluate_parameters(distance_matrix: np.ndarray,
+                         parameter_sets: List[Tuple[float, float, int]]) -> List[Optional[Dict[str, Any]]]:
+    """Process-pool entry point for QuantumLayer.evaluate_parameters"""
+    return _worker_layer().evaluate_parameters(distance_matrix, parameter_sets)
+
+
+class QAOAScheduler:
+    """
+    Bounded work queue in front of the quantum layer
+    Keeps a fixed number of QAOA jobs in flight across concurrent requests
+    """
+    
+    def __init__(self, get_quantum_layer: Callable[[], QuantumLayer], num_workers: int = 4, max_pending: int = 64):
+        self.get_quantum_layer = get_quantum_layer
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self._queue = None
+        self._workers = []
+        self._layer = None
+    
+    async def start(self):
+        """Start building the quantum layer in a thread and the worker tasks on the running event loop"""
+        # Construction can block (SDK import, IBM runtime authentication), so it
+        # never runs on the event loop; workers wait for this future instead
+        self._layer = asyncio.get_running_loop().run_in_executor(None, self.get_quantum_layer)
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+        logger.info(f"QAOA scheduler started with {self.num_workers} workers")
+    
+    async def stop(self):
+        """Cancel the worker tasks"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    async def submit(self, distance_matrix: np.ndarray) -> Dict[str, Any]:
+        """Queue a QAOA run and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((distance_matrix, future))
+        return await future
+    
+    async def _worker(self):
+        while True:
+            distance_matrix, future = await self._queue.get()
+            try:
+                # Shielded so cancelling one worker doesn't cancel the shared build
+                layer = await asyncio.shield(self._layer)
+                result = await layer.run_qaoa_circuit(distance_matrix)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
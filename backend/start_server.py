@@ -1,5 +1,6 @@
 import os
 import sys
+import hashlib
 import subprocess
 import logging
 
@@ -7,11 +8,24 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Hash of the last requirements file installed successfully
+DEPS_SENTINEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".deps.sha256")
+
 def install_requirements():
-    """Install Python requirements"""
+    """Install Python requirements, skipping pip when they haven't changed"""
     try:
+        with open("requirements.txt", "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if os.path.exists(DEPS_SENTINEL):
+            with open(DEPS_SENTINEL) as f:
+                if f.read().strip() == digest:
+                    logger.info("Requirements unchanged, skipping install")
+                    return
+        
         logger.info("Installing Python requirements...")
         subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        with open(DEPS_SENTINEL, "w") as f:
+            f.write(digest)
         logger.info("Requirements installed successfully")
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to install requirements: {e}")
@@ -22,7 +36,16 @@ def start_server():
     try:
         logger.info("Starting FastAPI server...")
         os.chdir("backend")
-        subprocess.run([sys.executable, "-m", "uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000", "--reload"])
+        
+        # Serve from this interpreter instead of spawning a second one
+        import uvicorn
+        reload = "--reload" in sys.argv
+        uvicorn.run(
+            "main:app", host="0.0.0.0", port=8000,
+            reload=reload,
+            workers=1 if reload else int(os.getenv("UVICORN_WORKERS", "1")),
+            loop="uvloop", http="httptools"
+        )
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
@@ -0,0 +1,136 @@
+"""
+Checks for the hand-written optimizer kernels: Held-Karp against brute force,
+and the invariants the 2-opt kernels must keep
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from classical_optimizer import (
+    ClassicalOptimizer, _as_kernel_matrix, _held_karp_njit, _nearest_neighbor_njit,
+    _two_opt_neighbors_njit, _two_opt_njit
+)
+from utils import calculate_distance_matrix
+
+
+def random_distance_matrix(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Kernel-ready distance matrix for n random stops in a delivery-sized area"""
+    coords = rng.uniform([40.5, -74.1], [40.9, -73.7], size=(n, 2))
+    return _as_kernel_matrix(calculate_distance_matrix(coords))
+
+
+def path_cost(route, distance_matrix: np.ndarray) -> float:
+    return float(sum(distance_matrix[a, b] for a, b in zip(route[:-1], route[1:])))
+
+
+def brute_force_cost(distance_matrix: np.ndarray, start: int) -> float:
+    """Cheapest open path from ``start`` over every ordering of the other stops"""
+    others = [k for k in range(len(distance_matrix)) if k != start]
+    return min(path_cost((start,) + order, distance_matrix) for order in itertools.permutations(others))
+
+
+@pytest.mark.parametrize("n", range(2, 9))
+def test_held_karp_matches_brute_force(n):
+    rng = np.random.default_rng(n)
+    for _ in range(3):
+        distance_matrix = random_distance_matrix(rng, n)
+        for start in range(n):
+            route = _held_karp_njit(distance_matrix, start)
+            assert route[0] == start
+            assert sorted(route.tolist()) == list(range(n))
+            assert path_cost(route, distance_matrix) == pytest.approx(
+                brute_force_cost(distance_matrix, start), rel=1e-5
+            )
+
+
+def test_held_karp_asymmetric_matrix():
+    rng = np.random.default_rng(0)
+    distance_matrix = rng.uniform(1, 10, size=(7, 7)).astype(np.float32)
+    np.fill_diagonal(distance_matrix, 0)
+    for start in range(7):
+        route = _held_karp_njit(distance_matrix, start)
+        assert path_cost(route, distance_matrix) == pytest.approx(
+            brute_force_cost(distance_matrix, start), rel=1e-5
+        )
+
+
+@pytest.mark.parametrize("n", [22, 30, 60, 150])
+def test_two_opt_keeps_permutation_and_never_worsens(n):
+    optimizer = ClassicalOptimizer()
+    for seed in range(10):
+        rng = np.random.default_rng(n * 100 + seed)
+        distance_matrix = random_distance_matrix(rng, n)
+        neighbors = optimizer.nearest_neighbor_lists(distance_matrix)
+        assert neighbors is not None
+        
+        # Already-good nearest-neighbour tours are where a cost model that
+        # wraps around to route[0] would accept worsening moves
+        starts = [
+            _nearest_neighbor_njit(distance_matrix, int(rng.integers(n))),
+            rng.permutation(n).astype(np.int64),
+        ]
+        for route in starts:
+            before = path_cost(route, distance_matrix)
+            for improved in (
+                _two_opt_neighbors_njit(route.copy(), distance_matrix, neighbors, 50),
+                _two_opt_njit(route.copy(), distance_matrix, 50),
+            ):
+                assert sorted(improved.tolist()) == list(range(n))
+                assert improved[0] == route[0]
+                assert path_cost(improved, distance_matrix) <= before + 1e-3
+
+
+def improving_two_opt_move(route, distance_matrix: np.ndarray):
+    """First (i, j) whose segment reversal shortens the open path, if any"""
+    n = len(route)
+    for i in range(1, n - 1):
+        for j in range(i + 1, n):
+            candidate = np.concatenate([route[:i], route[i:j + 1][::-1], route[j + 1:]])
+            if path_cost(candidate, distance_matrix) < path_cost(route, distance_matrix) - 1e-3:
+                return i, j
+    return None
+
+
+@pytest.mark.parametrize("n", [5, 12, 40])
+def test_full_two_opt_reaches_open_path_local_optimum(n):
+    for seed in range(5):
+        rng = np.random.default_rng(seed)
+        distance_matrix = random_distance_matrix(rng, n)
+        route = _two_opt_njit(rng.permutation(n).astype(np.int64), distance_matrix, 10_000)
+        assert improving_two_opt_move(route, distance_matrix) is None
+
+
+@pytest.mark.parametrize("n", [6, 25])
+def test_neighbor_two_opt_reverses_open_tail(n):
+    # Stops on a line, visited in order except for the last two: reversing the
+    # tail is the one improving move, and only an open-path cost model sees it
+    positions = np.arange(n, dtype=np.float32)
+    distance_matrix = np.abs(positions[:, None] - positions[None, :])
+    route = np.arange(n, dtype=np.int64)
+    route[-2:] = route[-2:][::-1]
+    neighbors = np.argsort(distance_matrix, axis=1)[:, 1:]
+    improved = _two_opt_neighbors_njit(route, distance_matrix, neighbors, 50)
+    assert improved.tolist() == list(range(n))
+
+
+def test_nearest_neighbor_lists_match_full_sort():
+    optimizer = ClassicalOptimizer()
+    rng = np.random.default_rng(7)
+    distance_matrix = random_distance_matrix(rng, 80)
+    expected = np.argsort(distance_matrix, axis=1, kind='stable')[:, 1:21]
+    np.testing.assert_array_equal(optimizer.nearest_neighbor_lists(distance_matrix, k=20), expected)
+    assert optimizer.nearest_neighbor_lists(distance_matrix, k=79) is None
+
+
+def test_nearest_neighbor_lists_exclude_self_among_duplicate_stops():
+    # Several stops at one address tie at distance zero with the node itself
+    rng = np.random.default_rng(8)
+    coords = rng.uniform([40.5, -74.1], [40.9, -73.7], size=(40, 2))
+    coords[5:12] = coords[5]
+    distance_matrix = _as_kernel_matrix(calculate_distance_matrix(coords))
+    neighbors = ClassicalOptimizer().nearest_neighbor_lists(distance_matrix, k=4)
+    assert neighbors.shape == (40, 4)
+    for node, row in enumerate(neighbors):
+        assert node not in row
+        assert np.all(np.diff(distance_matrix[node, row]) >= 0)
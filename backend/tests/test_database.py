@@ -0,0 +1,22 @@
+"""
+Checks for the packed route_data encoding
+"""
+import pytest
+
+pytest.importorskip('MySQLdb')
+pytest.importorskip('dbutils')
+
+from database import pack_route, unpack_route
+
+
+@pytest.mark.parametrize("route", [[], [0], [3, 1, 2, 0], list(range(500))[::-1], [2 ** 32 - 1, 0]])
+def test_pack_route_round_trip(route):
+    blob = pack_route(route)
+    assert len(blob) == 4 * len(route)
+    assert unpack_route(blob) == route
+
+
+def test_pack_route_is_little_endian_uint32():
+    assert pack_route([1, 256]) == b'\x01\x00\x00\x00\x00\x01\x00\x00'
+    with pytest.raises(Exception):
+        pack_route([-1])
@@ -0,0 +1,112 @@
+"""
+Checks for the distance matrix builders: FCC against Haversine, condensed
+output, and incremental updates through ``out`` / ``changed_index``
+"""
+import numpy as np
+import pytest
+
+from utils import (
+    FCC_MAX_SPAN_DEG, calculate_distance_matrix, condensed_to_square, distance_method,
+    haversine_distance, haversine_distance_matrix
+)
+
+
+def random_coordinates(rng: np.random.Generator, n: int, span: float = 0.4) -> np.ndarray:
+    """n (latitude, longitude) points in a span x span degree box around New York"""
+    return rng.uniform([40.5, -74.1], [40.5 + span, -74.1 + span], size=(n, 2))
+
+
+def test_fcc_matches_haversine_within_delivery_range():
+    rng = np.random.default_rng(0)
+    coords = random_coordinates(rng, 60, span=FCC_MAX_SPAN_DEG * 0.95)
+    assert distance_method(coords) == 'fcc'
+    fcc = calculate_distance_matrix(coords, dtype=np.float64)
+    exact = haversine_distance_matrix(coords)
+    off_diagonal = ~np.eye(len(coords), dtype=bool)
+    relative_error = np.abs(fcc - exact)[off_diagonal] / exact[off_diagonal]
+    # FCC follows the ellipsoid and Haversine a sphere, which alone differ by
+    # up to ~0.5% depending on latitude and bearing
+    assert relative_error.max() < 5e-3
+
+
+def test_wide_point_sets_use_haversine():
+    coords = np.array([[40.7, -74.0], [34.05, -118.25], [51.5, -0.13]])
+    assert distance_method(coords) == 'haversine'
+    D = calculate_distance_matrix(coords, dtype=np.float64)
+    for i in range(3):
+        for j in range(3):
+            assert D[i, j] == pytest.approx(haversine_distance(*coords[i], *coords[j]), rel=1e-9, abs=1e-9)
+
+
+def test_radian_input_matches_degrees():
+    rng = np.random.default_rng(1)
+    coords = random_coordinates(rng, 20)
+    np.testing.assert_allclose(
+        calculate_distance_matrix(np.radians(coords), units='radians', dtype=np.float64),
+        calculate_distance_matrix(coords, dtype=np.float64), rtol=1e-12
+    )
+
+
+@pytest.mark.parametrize("span", [0.4, 10.0])
+def test_condensed_round_trips_to_square(span):
+    rng = np.random.default_rng(2)
+    coords = random_coordinates(rng, 17, span=span)
+    square = calculate_distance_matrix(coords)
+    condensed = calculate_distance_matrix(coords, condensed=True)
+    assert condensed.shape == (17 * 16 // 2,)
+    expanded = condensed_to_square(condensed)
+    assert expanded.dtype == square.dtype
+    np.testing.assert_array_equal(expanded, expanded.T)
+    np.testing.assert_allclose(expanded, square, rtol=1e-6)
+
+
+def test_condensed_to_square_layout():
+    D = condensed_to_square(np.array([1.0, 2.0, 3.0]))
+    np.testing.assert_array_equal(D, [[0, 1, 2], [1, 0, 3], [2, 3, 0]])
+
+
+def test_out_is_filled_in_place():
+    rng = np.random.default_rng(3)
+    coords = random_coordinates(rng, 12)
+    out = np.empty((12, 12), dtype=np.float32)
+    assert calculate_distance_matrix(coords, out=out) is out
+    np.testing.assert_allclose(out, calculate_distance_matrix(coords), rtol=1e-6)
+
+
+@pytest.mark.parametrize("moved_to", [
+    (40.6, -74.0),      # stays compact: FCC row update
+    (44.5, -74.0),      # span grows past FCC_MAX_SPAN_DEG: full Haversine rebuild
+])
+def test_changed_index_update_matches_full_rebuild(moved_to):
+    rng = np.random.default_rng(4)
+    coords = random_coordinates(rng, 30)
+    method = distance_method(coords)
+    assert method == 'fcc'
+    out = calculate_distance_matrix(coords)
+    
+    coords[7] = moved_to
+    updated = calculate_distance_matrix(coords, out=out.copy(), changed_index=7, method=method)
+    np.testing.assert_allclose(updated, calculate_distance_matrix(coords), rtol=1e-6)
+
+
+def test_changed_index_update_back_into_fcc_regime():
+    rng = np.random.default_rng(5)
+    coords = random_coordinates(rng, 30)
+    coords[3] = (44.5, -74.0)
+    method = distance_method(coords)
+    assert method == 'haversine'
+    out = calculate_distance_matrix(coords)
+    
+    coords[3] = (40.7, -73.9)
+    assert distance_method(coords) == 'fcc'
+    updated = calculate_distance_matrix(coords, out=out, changed_index=3, method=method)
+    np.testing.assert_allclose(updated, calculate_distance_matrix(coords), rtol=1e-6)
+
+
+def test_changed_index_requires_previous_method():
+    coords = random_coordinates(np.random.default_rng(6), 5)
+    out = calculate_distance_matrix(coords)
+    with pytest.raises(ValueError):
+        calculate_distance_matrix(coords, out=out, changed_index=0)
+    with pytest.raises(ValueError):
+        calculate_distance_matrix(coords, out=np.empty((4, 4), dtype=np.float32))
@@ -1,12 +1,20 @@
 import numpy as np
 import math
-from typing import List, Tuple
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+from numba import njit, prange, vectorize
+from numpy.typing import DTypeLike
 
+@lru_cache(maxsize=100_000)
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate the great circle distance between two points 
     on the earth (specified in decimal degrees) using Haversine formula
-    Returns distance in kilometers
+    Returns distance in kilometers; repeated pairs are served from a cache
     """
     # Convert decimal degrees to radians
     lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
@@ -15,34 +23,288 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     dlat = lat2 - lat1
     dlon = lon2 - lon1
     a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
+    # atan2 form stays well-conditioned for near-antipodal points
+    a = min(a, 1.0)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     
     # Radius of earth in kilometers
     r = 6371
     
     return c * r
 
-def calculate_distance_matrix(coordinates: List[Tuple[float, float]]) -> np.ndarray:
+# Radius of earth in kilometers
+EARTH_RADIUS_KM = 6371.0
+
+# Numba's default (workqueue) threading layer does not support parallel kernels
+# being launched from several threads at once; request threads take this lock
+# around every parallel=True call
+NUMBA_PARALLEL_LOCK = threading.Lock()
+
+def worker_share(total: int) -> int:
+    """
+    This process's share of a machine-wide resource (CPU workers, DB
+    connections) when UVICORN_WORKERS server processes run side by side
+    """
+    return max(1, total // max(1, int(os.getenv('UVICORN_WORKERS', '1'))))
+
+def start_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool that is safe to start from a request thread: workers come
+    from a clean forkserver (spawn where unavailable) rather than a fork of
+    this multi-threaded process, which can inherit held locks and TBB state
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+
+@vectorize(['float64(float64, float64, float64, float64)'], target='parallel', fastmath=True, cache=True)
+def haversine_ufunc(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Haversine distance in km between degree coordinates as a broadcasting ufunc,
+    e.g. haversine_ufunc(lat[:, None], lon[:, None], lat, lon); threaded, so
+    concurrent callers must hold NUMBA_PARALLEL_LOCK
+    """
+    lat1 = math.radians(lat1)
+    lat2 = math.radians(lat2)
+    sin_dlat = math.sin((lat2 - lat1) / 2)
+    sin_dlon = math.sin(math.radians(lon2 - lon1) / 2)
+    a = min(sin_dlat * sin_dlat + math.cos(lat1) * math.cos(lat2) * sin_dlon * sin_dlon, 1.0)
+    return 2 * EARTH_RADIUS_KM * math.atan2(math.sqrt(a), math.sqrt(1.0 - a))
+
+# Below this many points the NumPy broadcast is cheaper than the threaded kernel
+PARALLEL_HAVERSINE_MIN_POINTS = 256
+
+@njit(nogil=True, fastmath=True, cache=True)
+def _haversine_pair_njit(lat1: float, lon1: float, cos_lat1: float,
+                         lat2: float, lon2: float, cos_lat2: float) -> float:
+    """Haversine distance in km for radian coordinates with precomputed cos(lat)"""
+    sin_dlat = math.sin((lat2 - lat1) / 2)
+    sin_dlon = math.sin((lon2 - lon1) / 2)
+    a = min(sin_dlat * sin_dlat + cos_lat1 * cos_lat2 * sin_dlon * sin_dlon, 1.0)
+    return 2 * EARTH_RADIUS_KM * math.atan2(math.sqrt(a), math.sqrt(1.0 - a))
+
+# Points per tile in the parallel kernel; the lat/lon/cos slices of one row
+# tile and one column tile fit comfortably in L1
+_HAVERSINE_TILE = 64
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _haversine_matrix_njit(lat: np.ndarray, lon: np.ndarray, D: np.ndarray) -> np.ndarray:
+    """
+    Haversine distances for radian coordinates into the zeroed matrix ``D``,
+    row tiles split across threads; computed in float64 and cast on store
+    """
+    n = lat.shape[0]
+    cos_lat = np.cos(lat)
+    n_tiles = (n + _HAVERSINE_TILE - 1) // _HAVERSINE_TILE
+    for t in prange(n_tiles):
+        i0 = t * _HAVERSINE_TILE
+        i1 = min(i0 + _HAVERSINE_TILE, n)
+        # Upper triangle only, walked one column tile at a time
+        for j0 in range(i0, n, _HAVERSINE_TILE):
+            j1 = min(j0 + _HAVERSINE_TILE, n)
+            for i in range(i0, i1):
+                for j in range(max(i + 1, j0), j1):
+                    d = _haversine_pair_njit(lat[i], lon[i], cos_lat[i], lat[j], lon[j], cos_lat[j])
+                    D[i, j] = d
+                    D[j, i] = d
+    return D
+
+# FCC flat-earth formula is only accurate below ~475 km; beyond this span use haversine
+FCC_MAX_SPAN_DEG = 3.0
+
+def distance_method(coordinates: Union[np.ndarray, List[Tuple[float, float]]],
+                    units: str = 'degrees') -> str:
+    """Formula calculate_distance_matrix uses for these points: 'fcc' or 'haversine'"""
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    max_span = FCC_MAX_SPAN_DEG if units == 'degrees' else math.radians(FCC_MAX_SPAN_DEG)
+    if len(coords) and np.all(np.ptp(coords, axis=0) <= max_span):
+        return 'fcc'
+    return 'haversine'
+
+def calculate_distance_matrix(coordinates: Union[np.ndarray, List[Tuple[float, float]]],
+                              units: str = 'degrees', condensed: bool = False,
+                              dtype: DTypeLike = np.float32, out: Optional[np.ndarray] = None,
+                              changed_index: Optional[int] = None,
+                              method: Optional[str] = None) -> np.ndarray:
     """
-    Calculate distance matrix for all coordinate pairs using Haversine formula
+    Calculate distance matrix for all coordinate pairs
+    
+    ``coordinates`` is an (n, 2) array-like of (latitude, longitude) in
+    ``units`` ('degrees' or 'radians'). It is split once into contiguous
+    latitude and longitude arrays that every kernel reads directly.
+    Compact point sets (typical delivery areas) use the FCC approximation,
+    wider ones fall back to the Haversine formula (see ``distance_method``).
+    With ``condensed=True`` only the n*(n-1)/2 pairs above the diagonal are
+    computed and returned in row-major order (see ``condensed_to_square``).
+    Distances are computed in float64 and stored as ``dtype``; float32 keeps
+    metre precision at delivery scale with half the memory traffic.
+    
+    A square ``out`` buffer is filled in place instead of allocating a new
+    matrix. If ``out`` already holds the matrix for these coordinates except
+    point ``changed_index``, only that row and column are recomputed;
+    ``method`` must then name the formula ``out`` was built with, and if the
+    change moves the points into the other regime the whole matrix is rebuilt.
     """
-    n = len(coordinates)
-    matrix = np.zeros((n, n))
+    if units not in ('degrees', 'radians'):
+        raise ValueError(f"units must be 'degrees' or 'radians', got {units!r}")
+    if method not in (None, 'fcc', 'haversine'):
+        raise ValueError(f"method must be 'fcc' or 'haversine', got {method!r}")
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    n = len(coords)
+    if out is not None and (condensed or out.shape != (n, n)):
+        raise ValueError(f"out must be a square ({n}, {n}) matrix")
+    if changed_index is not None and (out is None or method is None):
+        raise ValueError("changed_index requires the previous matrix as out and the method it was built with")
     
-    for i in range(n):
-        for j in range(i + 1, n):
-            lat1, lon1 = coordinates[i]
-            lat2, lon2 = coordinates[j]
-            distance = haversine_distance(lat1, lon1, lat2, lon2)
-            matrix[i][j] = distance
-            matrix[j][i] = distance  # Symmetric matrix
+    current_method = distance_method(coords, units)
+    if current_method == 'fcc':
+        build = fcc_distance_matrix
+    else:
+        build = haversine_distance_matrix
     
-    return matrix
+    if changed_index is not None and method == current_method:
+        distances = build(coords, units, dtype=out.dtype, row=changed_index)
+        out[changed_index, :] = distances
+        out[:, changed_index] = distances
+        return out
+    return build(coords, units, condensed, dtype, out=out)
+
+def condensed_to_square(distances: np.ndarray) -> np.ndarray:
+    """Expand a condensed upper-triangle distance vector into the full symmetric matrix"""
+    n = int(round((1 + math.sqrt(1 + 8 * len(distances))) / 2))
+    D = np.zeros((n, n), dtype=distances.dtype)
+    upper = np.triu_indices(n, k=1)
+    D[upper] = distances
+    D.T[upper] = distances
+    return D
+
+def _coordinate_columns(coordinates: Union[np.ndarray, List[Tuple[float, float]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Split (n, 2) coordinates into contiguous latitude and longitude arrays"""
+    lat, lon = np.array(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2).T, order='C')
+    return lat, lon
+
+def coords_to_radians(coordinates: Union[np.ndarray, List[Tuple[float, float]]]) -> np.ndarray:
+    """
+    (n, 2) degree coordinates as a float64 radian array; convert once at
+    ingest and pass units='radians' to the distance functions afterwards
+    """
+    return np.radians(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+
+def _radian_columns(coordinates: Union[np.ndarray, List[Tuple[float, float]]],
+                    units: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Contiguous latitude and longitude arrays in radians"""
+    if units == 'degrees':
+        coordinates = coords_to_radians(coordinates)
+    return _coordinate_columns(coordinates)
+
+def _pair_indexers(n: int, condensed: bool, row: Optional[int] = None):
+    """
+    Row/column indexers selecting every pair (broadcast), the upper triangle,
+    or a single row against every point
+    """
+    if row is not None:
+        return row, np.s_[:]
+    if condensed:
+        return np.triu_indices(n, k=1)
+    return np.s_[:, None], np.s_[None, :]
+
+def haversine_distance_matrix(coordinates: Union[np.ndarray, List[Tuple[float, float]]],
+                              units: str = 'degrees', condensed: bool = False,
+                              dtype: DTypeLike = np.float32, out: Optional[np.ndarray] = None,
+                              row: Optional[int] = None) -> np.ndarray:
+    """
+    Distance matrix for all coordinate pairs using the Haversine formula
+    
+    With ``row`` set, only the distances from that point to every point are
+    returned.
+    """
+    lat, lon = _radian_columns(coordinates, units)
+    n = len(lat)
+    
+    if row is None and n >= PARALLEL_HAVERSINE_MIN_POINTS:
+        if out is None:
+            D = np.zeros((n, n), dtype=dtype)
+        else:
+            D = out
+            np.fill_diagonal(D, 0.0)
+        with NUMBA_PARALLEL_LOCK:
+            _haversine_matrix_njit(lat, lon, D)
+        return D[np.triu_indices(n, k=1)] if condensed else D
+    
+    # Unit vectors on the sphere; one BLAS product gives every pairwise dot
+    # product, and |p - q|^2 = 2 - 2 p.q is the squared chord length
+    cos_lat = np.cos(lat)
+    xyz = np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+    if row is not None:
+        chord_sq = 2.0 - 2.0 * (xyz @ xyz[row])
+    elif condensed:
+        i, j = np.triu_indices(n, k=1)
+        chord_sq = 2.0 - 2.0 * np.einsum('ij,ij->i', xyz[i], xyz[j])
+    else:
+        chord_sq = 2.0 - 2.0 * (xyz @ xyz.T)
+    np.clip(chord_sq, 0.0, 4.0, out=chord_sq)
+    
+    arc = np.arcsin(np.sqrt(chord_sq) / 2)
+    if out is None:
+        D = (2 * EARTH_RADIUS_KM * arc).astype(dtype, copy=False)
+    else:
+        D = np.multiply(2 * EARTH_RADIUS_KM, arc, out=out)
+    if row is not None:
+        D[row] = 0.0
+    elif not condensed:
+        np.fill_diagonal(D, 0.0)
+    return D
+
+def fcc_distance_matrix(coordinates: Union[np.ndarray, List[Tuple[float, float]]],
+                        units: str = 'degrees', condensed: bool = False,
+                        dtype: DTypeLike = np.float32, out: Optional[np.ndarray] = None,
+                        row: Optional[int] = None) -> np.ndarray:
+    """
+    Distance matrix using the FCC ellipsoidal flat-earth formula (47 CFR 73.208)
+    
+    Kilometres per degree are evaluated at each pair's mean latitude. The
+    cosine of the mean latitude comes from precomputed half-angle terms and
+    its multiples from Chebyshev recurrences, so no trig runs per pair.
+    With ``row`` set, only the distances from that point to every point are
+    returned.
+    """
+    lat, lon = _coordinate_columns(coordinates)
+    if units == 'degrees':
+        lat_rad = np.radians(lat)
+    else:
+        lat_rad = lat
+        lat, lon = np.degrees(lat), np.degrees(lon)
+    
+    half_lat = lat_rad / 2
+    cos_half = np.cos(half_lat)
+    sin_half = np.sin(half_lat)
+    row, col = _pair_indexers(len(lat), condensed, row)
+    
+    # cos(mean latitude) = cos(a/2 + b/2), then cos(k * mean) for k = 2..5
+    c1 = cos_half[row] * cos_half[col] - sin_half[row] * sin_half[col]
+    c2 = 2 * c1**2 - 1
+    c3 = (4 * c1**2 - 3) * c1
+    c4 = 2 * c2**2 - 1
+    c5 = (16 * c1**4 - 20 * c1**2 + 5) * c1
+    
+    k1 = 111.13209 - 0.56605 * c2 + 0.00120 * c4
+    k2 = 111.41513 * c1 - 0.09455 * c3 + 0.00012 * c5
+    
+    dlat = lat[row] - lat[col]
+    dlon = lon[row] - lon[col]
+    
+    if out is not None:
+        return np.hypot(k1 * dlat, k2 * dlon, out=out)
+    return np.hypot(k1 * dlat, k2 * dlon).astype(dtype, copy=False)
 
 def validate_coordinates(lat: float, lon: float) -> bool:
     """Validate latitude and longitude coordinates"""
     return -90 <= lat <= 90 and -180 <= lon <= 180
 
+def validate_coordinates_batch(coordinates: Union[np.ndarray, List[Tuple[float, float]]]) -> np.ndarray:
+    """Boolean mask of the (lat, lon) rows that are in range; NaN and inf fail"""
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    return (np.abs(coords[:, 0]) <= 90) & (np.abs(coords[:, 1]) <= 180)
+
 def format_distance(distance_km: float) -> str:
     """Format distance for display"""
     if distance_km < 1:
@@ -50,8 +312,70 @@ def format_distance(distance_km: float) -> str:
     else:
         return f"{distance_km:.2f} km"
 
-def calculate_route_statistics(route: List[int], distance_matrix: np.ndarray) -> dict:
-    """Calculate statistics for a route"""
+def format_distances(distances_km: Union[np.ndarray, List[float]]) -> List[str]:
+    """Format many distances for display, matching format_distance per element"""
+    distances = np.asarray(distances_km, dtype=np.float64).ravel()
+    meters = np.rint(distances * 1000).astype(np.int64).tolist()
+    below_km = (distances < 1).tolist()
+    return [
+        f"{m} m" if short else f"{km:.2f} km"
+        for m, short, km in zip(meters, below_km, distances.tolist())
+    ]
+
+@njit(nogil=True, cache=True)
+def _route_statistics_njit(D: np.ndarray, route: np.ndarray) -> Tuple[float, float, float]:
+    """Total, longest and shortest segment of a route in a single pass"""
+    total = 0.0
+    longest = -np.inf
+    shortest = np.inf
+    for k in range(route.shape[0] - 1):
+        d = D[route[k], route[k + 1]]
+        total += d
+        longest = max(longest, d)
+        shortest = min(shortest, d)
+    return total, longest, shortest
+
+class DistanceOracle:
+    """
+    Lazily evaluated stand-in for a haversine distance matrix
+    
+    Pairs are computed on first lookup and memoized, so consumers that only
+    touch a few entries (e.g. the segments of one route) skip the O(n^2)
+    matrix build.
+    """
+    
+    def __init__(self, coordinates: Union[np.ndarray, List[Tuple[float, float]]],
+                 units: str = 'degrees'):
+        lat, lon = _radian_columns(coordinates, units)
+        self.lat = lat
+        self.lon = lon
+        self.cos_lat = np.cos(lat)
+        self._cache = {}
+    
+    def __len__(self) -> int:
+        return len(self.lat)
+    
+    def __call__(self, i: int, j: int) -> float:
+        """Distance in km between points ``i`` and ``j``"""
+        if i == j:
+            return 0.0
+        key = (i, j) if i < j else (j, i)
+        distance = self._cache.get(key)
+        if distance is None:
+            distance = self._cache[key] = _haversine_pair_njit(
+                self.lat[i], self.lon[i], self.cos_lat[i],
+                self.lat[j], self.lon[j], self.cos_lat[j]
+            )
+        return distance
+    
+    def route_segments(self, route: List[int]) -> np.ndarray:
+        """Distances between consecutive stops of ``route``"""
+        return np.fromiter((self(a, b) for a, b in zip(route[:-1], route[1:])),
+                           dtype=np.float64, count=max(len(route) - 1, 0))
+
+def calculate_route_statistics(route: List[int],
+                               distance_matrix: Union[np.ndarray, DistanceOracle]) -> dict:
+    """Calculate statistics for a route from a distance matrix or DistanceOracle"""
     if len(route) < 2:
         return {
             'total_distance': 0,
@@ -60,18 +384,19 @@ def calculate_route_statistics(route: List[int], distance_matrix: np.ndarray) ->
             'shortest_segment': 0
         }
     
-    segments = []
-    total_distance = 0
-    
-    for i in range(len(route) - 1):
-        segment_distance = distance_matrix[route[i]][route[i + 1]]
-        segments.append(segment_distance)
-        total_distance += segment_distance
+    if isinstance(distance_matrix, DistanceOracle):
+        segments = distance_matrix.route_segments(route)
+        total, longest, shortest = segments.sum(), segments.max(), segments.min()
+    else:
+        total, longest, shortest = _route_statistics_njit(
+            np.asarray(distance_matrix), np.asarray(route, dtype=np.int64)
+        )
+    segment_count = len(route) - 1
     
     return {
-        'total_distance': total_distance,
-        'average_segment': np.mean(segments),
-        'longest_segment': np.max(segments),
-        'shortest_segment': np.min(segments),
-        'segment_count': len(segments)
+        'total_distance': float(total),
+        'average_segment': float(total / segment_count),
+        'longest_segment': float(longest),
+        'shortest_segment': float(shortest),
+        'segment_count': segment_count
     }
\ No newline at end of file